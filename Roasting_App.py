@@ -1,111 +1,110 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import os
-from datetime import datetime
 import io
-import re
-import csv
 import time # 시간 계산용
 import matplotlib.patheffects as pe
+from roast_core import (ALIGNS, ROR_WINDOWS, IngestCache, PerfLog, ReplaySource, RerunTimer, RingBuffer, RoastIndex, RoastSession,
+                        RoastWriter, Sampler, SerialSource, SimilarityIndex, SimulatorSource, SummaryTable, TcpSource,
+                        compute_ror, format_mmss, get_dtr_feedback, get_intl_date_str, get_template_csv,
+                        load_and_standardize_csv, open_store, roast_energy_kj, start_profile, stop_profile)
+from roast_plot import (CHART_DPI, ChartCache, background_mark, finish_roast_figure, new_roast_figure, plot_roast_data,
+                        plot_roast_overlay, render_png)
 
 # --- 설정 및 스타일 ---
 st.set_page_config(page_title="Roasting Analysis Center", layout="wide", page_icon="☕")
+perf = RerunTimer() # rerun 단계별 시간 (맨 아래에서 로그 기록)
+# st.rerun() 으로 중간에 끝난 rerun 의 프로파일러가 남아 있으면 끔
+if st.session_state.get('active_profile'): st.session_state.pop('active_profile').disable()
+prof = start_profile() if st.session_state.pop('profile_next', False) else None
+st.session_state.active_profile = prof
 
 # 한글 폰트 설정
 try: plt.rcParams['font.family'] = 'Malgun Gothic' 
 except: plt.rcParams['font.family'] = 'AppleGothic'
 plt.rcParams['axes.unicode_minus'] = False
 
-DEFAULT_DATA_FILE = 'saemmulter_roasting_db.csv'
+DEFAULT_DATA_FILE = 'saemmulter_roasting_db.csv' # 예전 CSV DB (최초 실행 시 자동 마이그레이션)
+DEFAULT_DB_DIR = 'saemmulter_roasting_db' # 컬럼형 저장소 (Arrow)
+INGEST_CACHE_DIR = os.path.join(DEFAULT_DB_DIR, 'ingest_cache') # 업로드 파싱 결과 (재시작 후에도 유지)
+INGEST_CACHE_MB = 256
+INGEST_DISK_MB = 512 # 디스크 캐시 한도 (넘으면 오래 안 쓴 파일부터 삭제)
+LIVE_BUFFER_SIZE = 5 * 60 * 60 # 링버퍼 크기 (5Hz 로 1시간)
+LIVE_IDLE_TIMEOUT = 5 * 60 # 화면 갱신이 이만큼 없으면 (탭 닫힘, 세션 만료) 샘플러가 스스로 멈춤. 백그라운드 탭의 타이머 제한(1분)보다 넉넉히
+LIVE_SOURCES = ["시뮬레이터 (Simulator)", "파일 재생 (Replay)", "시리얼 (Serial)", "TCP"]
+PERF_LOG_FILE = os.path.join(DEFAULT_DB_DIR, 'perf', 'reruns.jsonl') # rerun 성능 기록 (JSON lines, 5MB x 3 개 순환)
+PERF_LOG_MB = 5
+DEBUG_PANEL = os.environ.get('ROAST_DEBUG') == '1' # 또는 주소 뒤에 ?debug=1
+ANALYSIS_DETAIL_MAX = 8 # 분석 모드에서 이 개수를 넘으면 마커/이벤트 없이 선만 (다운샘플) 그림
+CHART_CACHE_ITEMS = 64 # 분석 모드 그래프 PNG 캐시 개수 (장당 약 0.2MB)
+CHART_CACHE_LAYERS = 4 # 로스팅 모드 배경 레이어 캐시 개수 (장당 약 6MB)
 
 # --- 함수 모음 ---
-def get_intl_date_str():
-    now = datetime.now()
-    months = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    return f"{now.year}{months[now.month]}{now.day:02d}"
-
-def get_dtr_feedback(dtr):
-    """DTR 수치에 따른 맛 평가 멘트"""
-    if dtr < 10: return "⚠️ 언더 디벨롭 (Under Developed): 풋내나 떫은 맛이 날 수 있어요. 시간을 조금 더 늘려보세요."
-    elif dtr <= 15: return "🍓 노르딕/라이트 (Light): 꽃향기와 화사한 산미, 차(Tea) 같은 깔끔함이 특징이에요."
-    elif dtr <= 20: return "⚖️ 미디엄/밸런스 (Medium): 단맛과 산미가 가장 조화로운 황금 비율이에요! (추천)"
-    elif dtr <= 25: return "🍫 미디엄 다크 (Medium Dark): 산미는 줄고 바디감과 초콜릿 향이 살아나요."
-    else: return "🔥 다크 (Dark): 묵직한 바디감, 스모키함, 쌉쌀한 맛이 강조돼요."
-
-def format_mmss(seconds):
-    m = int(seconds // 60); s = int(seconds % 60)
-    return f"{m}:{s:02d}"
-
-def load_and_standardize_csv(file, file_name_fallback):
-    try:
-        file.seek(0)
-        raw = file.read()
-        if isinstance(raw, str): content = raw
-        else:
-            try: content = raw.decode("utf-8-sig")
-            except: content = raw.decode("cp949", errors="ignore")
-        lines = content.splitlines()
-        candidates = [",", "\t", ";"]
-        header_row_idx = None
-        delimiter = ","
-        extracted_id = None
-        for i, line in enumerate(lines):
-            if not line.strip(): continue
-            if ("원두" in line) or ("bean" in line.lower()):
-                parts = [p.strip() for p in re.split(r"[,\t;]", line)]
-                if len(parts) > 1 and parts[1]: extracted_id = parts[1]
-            for d in candidates:
-                cells = [c.strip().lower() for c in line.split(d)]
-                if any(("time" in c) or ("시간" in c) for c in cells) and any(("temp" in c) or ("온도" in c) for c in cells):
-                    header_row_idx = i; delimiter = d; break
-            if header_row_idx is not None: break
-        if header_row_idx is None: return None
-        data_text = "\n".join(lines[header_row_idx:])
-        rows = list(csv.reader(io.StringIO(data_text), delimiter=delimiter))
-        if not rows: return None
-        header = [str(c).strip() for c in rows[0]]
-        while header and header[-1] == "": header.pop()
-        expected = len(header)
-        cleaned = []
-        for r in rows[1:]:
-            r = [str(c).strip() for c in r]
-            if not any(r): continue
-            if len(r) > expected: r = r[:expected]
-            elif len(r) < expected: r = r + [""] * (expected - len(r))
-            cleaned.append(r)
-        df = pd.DataFrame(cleaned, columns=header)
-        df.columns = [str(c).strip() for c in df.columns]
-        col_map = {}
-        for col in df.columns:
-            c = col.lower()
-            if ("time" in c) or ("시간" in c): col_map[col] = "Time"
-            elif ("temp" in c) or ("온도" in c): col_map[col] = "Temp"
-            elif ("gas" in c) or ("가스" in c): col_map[col] = "Gas"
-            elif ("event" in c) or ("이벤트" in c): col_map[col] = "Event"
-        df.rename(columns=col_map, inplace=True)
-        if ("Time" not in df.columns) or ("Temp" not in df.columns): return None
-        out = pd.DataFrame()
-        out["Time"] = pd.to_numeric(df["Time"], errors="coerce")
-        out["Temp"] = pd.to_numeric(df["Temp"], errors="coerce")
-        out["Gas"] = pd.to_numeric(df["Gas"], errors="coerce").fillna(0) if "Gas" in df.columns else 0
-        if "Event" in df.columns:
-            out["Event"] = df["Event"].fillna("").astype(str)
-            out.loc[out["Event"].str.lower() == "nan", "Event"] = ""
-        else: out["Event"] = ""
-        out = out.dropna(subset=["Time", "Temp"])
-        out["Roast_ID"] = extracted_id if extracted_id else file_name_fallback.replace(".csv", "")
-        return out
-    except: return None
-
-def get_template_csv():
-    return """파일 이름,Sample_01\n날짜,2026-Jan-01\n원두 이름,Geisha\n결과무게,215\n비고,템플릿\n\nTime(sec),Temp(C),Gas,Event\n0,200,0.5,Charge\n60,90,5.0,TP\n300,150,4.0,Yellowing\n540,192,2.0,1C Start\n600,205,0,Drop"""
-
-def check_is_crack(event_str):
-    e = event_str.lower().strip()
-    is_1c = any(k in e for k in ["1c", "1st", "first", "pop"]) and not ("end" in e) and not ("2" in e)
-    is_2c = any(k in e for k in ["2c", "2nd", "second"])
-    return is_1c, is_2c
+@st.cache_resource
+def get_store():
+    return open_store(DEFAULT_DB_DIR, legacy_csv=DEFAULT_DATA_FILE)
+
+@st.cache_resource
+def get_writer():
+    # 모든 세션의 저장 요청을 한 스레드가 모아서 기록
+    return RoastWriter(get_store())
+
+@st.cache_resource
+def get_summary():
+    return SummaryTable(get_store())
+
+@st.cache_resource
+def get_perf_log():
+    return PerfLog(PERF_LOG_FILE, max_mb=PERF_LOG_MB)
+
+@st.cache_resource
+def get_similarity(align):
+    return SimilarityIndex(get_store(), align=align)
+
+@st.cache_resource
+def get_chart_cache():
+    # 렌더링한 그래프 PNG / 배경 레이어 (모든 세션 공유)
+    return ChartCache(max_items=CHART_CACHE_ITEMS, max_layers=CHART_CACHE_LAYERS)
+
+@st.cache_resource
+def get_ingest_cache():
+    # 캐시 키의 파서 버전은 roast_core.parsing.PARSER_VERSION
+    return IngestCache(max_bytes=INGEST_CACHE_MB * 1024 * 1024, disk_dir=INGEST_CACHE_DIR, max_disk_bytes=INGEST_DISK_MB * 1024 * 1024)
+
+def merge_live_points(buf, roast):
+    """링버퍼 샘플 + 수동 이벤트(RoastSession) -> 시간순 DataFrame"""
+    t, temp, gas = buf.snapshot()
+    stream = pd.DataFrame({"Time": t.round(1), "Temp": temp.round(1), "Gas": gas, "Event": None, "Roast_ID": roast.roast_id})
+    merged = pd.concat([stream, roast.frame()[stream.columns]], ignore_index=True) if roast else stream
+    merged["Event"] = merged["Event"].astype(object).where(merged["Event"].notna(), None)
+    return merged.sort_values('Time', kind='stable').reset_index(drop=True)
+
+def stop_live():
+    """센서 기록 종료: 샘플러(스레드 + 장치 연결)를 멈추고 스트림 + 이벤트를 합쳐서 기존 편집/저장 흐름으로 넘김"""
+    live, roast = st.session_state.live, st.session_state.roast
+    live['sampler'].stop()
+    roast.replace(merge_live_points(live['buffer'], roast))
+    st.session_state.live = None
+    st.session_state.start_time = None
+
+def live_panel(live):
+    """실시간 현황 (fragment 로 일정 간격마다 이 부분만 다시 그림)"""
+    live['sampler'].touch()
+    t, temp, _ = live['buffer'].snapshot()
+    if live['sampler'].error: st.error(f"센서 오류: {live['sampler'].error}")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("경과 시간", format_mmss(time.time() - live['sampler'].start_time))
+    if not len(t):
+        st.info("센서 데이터를 기다리는 중...")
+        return
+    r = compute_ror(t, temp, window=30, max_labels=0)
+    m2.metric("현재 온도", f"{temp[-1]:.1f} ℃")
+    m3.metric("RoR (30초)", f"{r.ror[-1]:.1f}" if len(r.ror) else "-")
+    chart = pd.DataFrame({"Temp": temp}, index=pd.Index(t, name="Time"))
+    if len(r.ror): chart["RoR"] = np.interp(t, r.x, r.ror)
+    st.line_chart(chart, height=300)
 
 # --- 사이드바 ---
 st.sidebar.markdown("## 🇵🇪 PERU COFFEE ORIGINS")
@@ -114,7 +113,7 @@ st.sidebar.info("**페루의 Micro/Nano Lot 최상급 스페셜티 커피를 소
 # [핵심] 모드 3가지로 확장
 mode = st.sidebar.radio(
     "모드 선택 (Mode)", 
-    ["📊 데이터 분석 (Analysis)", "🔥 로스팅 (Manual)", "⏱️ 로스팅 + 시계 (Auto-Timer)"],
+    ["📊 데이터 분석 (Analysis)", "🔥 로스팅 (Manual)", "⏱️ 로스팅 + 시계 (Auto-Timer)", "📡 로스팅 + 센서 (Live)"],
     index=0
 )
 
@@ -131,29 +130,57 @@ with c4: st.link_button("⚡ Web\nRoasting\nLogger", "https://roastinglog.netlif
 st.sidebar.markdown("---")
 st.sidebar.caption("📂 레퍼런스 센터")
 
-all_history = []
-if os.path.exists(DEFAULT_DATA_FILE):
-    try:
-        db_df = pd.read_csv(DEFAULT_DATA_FILE)
-        if 'Roast_ID' in db_df.columns: all_history.append(db_df)
-    except: pass
+perf.lap("sidebar")
 
+# DB 는 매니페스트(Roast_ID 목록)만 읽고, 실제 데이터는 선택된 로스팅만 읽음
+store = get_store()
+if store.migration_error: st.error(f"기존 DB({DEFAULT_DATA_FILE}) 를 옮기지 못했습니다: {store.migration_error} - 파일을 확인한 뒤 앱을 다시 시작하세요.")
+history_ids = store.roast_ids()
+perf.lap("db_manifest", rows=len(history_ids))
+
+all_uploads = []
 uploaded_files = st.sidebar.file_uploader("로스팅 기록 파일 업로드", accept_multiple_files=True, type=['csv'])
 if uploaded_files:
+    ingest_cache = get_ingest_cache()
     for f in uploaded_files:
-        pdf = load_and_standardize_csv(f, f.name)
-        if pdf is not None: all_history.append(pdf)
-
-full_df = pd.DataFrame()
-if all_history:
-    full_df = pd.concat(all_history, ignore_index=True)
+        # 같은 내용의 파일은 다시 파싱하지 않음
+        pdf = ingest_cache.get_or_load(f.getvalue(), f.name, load_and_standardize_csv)
+        if pdf is not None: all_uploads.append(pdf)
+perf.lap("uploads", rows=sum(len(u) for u in all_uploads))
+
+# 업로드 파일이 바뀔 때만 Roast_ID 인덱스를 다시 만듦 (캐시된 DataFrame 객체가 같으면 재사용)
+cached_idx = st.session_state.get('upload_index')
+if cached_idx and len(cached_idx[0]) == len(all_uploads) and all(a is b for a, b in zip(cached_idx[0], all_uploads)):
+    upload_index = cached_idx[1]
+else:
+    upload_index = RoastIndex(pd.concat(all_uploads, ignore_index=True) if all_uploads else None)
+    st.session_state.upload_index = (tuple(all_uploads), upload_index)
+uids = list(dict.fromkeys(history_ids + upload_index.ids)) if upload_index.ids else history_ids
+perf.lap("upload_index", rows=len(upload_index.df))
+
+def load_roasts(ids):
+    """선택한 Roast_ID 만 저장소 + 업로드 파일에서 가져오기 -> {Roast_ID: 시간순 DataFrame}"""
+    with perf.timed("load_roasts") as info:
+        hist_index = RoastIndex(store.read(ids))
+        out = {}
+        for pid in ids:
+            parts = [idx.get(pid) for idx in (hist_index, upload_index) if pid in idx]
+            if not parts: continue
+            out[pid] = parts[0] if len(parts) == 1 else pd.concat(parts).sort_values('Time').reset_index(drop=True)
+        info["rows"] = sum(map(len, out.values()))
+    return out
 
 # 전역 변수 설정
 selected_ids_analysis = []
+focus_id = None
 reference_id_roasting = None
+ror_window = 0
 is_analysis_mode = (mode == "📊 데이터 분석 (Analysis)")
 is_manual_mode = (mode == "🔥 로스팅 (Manual)")
 is_auto_mode = (mode == "⏱️ 로스팅 + 시계 (Auto-Timer)")
+is_live_mode = (mode == "📡 로스팅 + 센서 (Live)")
+# 센서 모드를 떠나면 STOP 과 같이 샘플러를 멈춤 (스레드/포트가 남지 않도록, 기록은 일반 기록으로 넘어감)
+if not is_live_mode and st.session_state.get('live'): stop_live()
 
 # ==========================================
 # 3. 모드별 로직
@@ -162,9 +189,25 @@ is_auto_mode = (mode == "⏱️ 로스팅 + 시계 (Auto-Timer)")
 # [A] 데이터 분석 모드
 if is_analysis_mode:
     st.title("📊 Data Analysis Center")
-    if not full_df.empty:
-        uids = list(full_df['Roast_ID'].unique())
+    if uids:
         selected_ids_analysis = st.sidebar.multiselect(f"비교할 그래프 선택 ({len(uids)}개)", uids)
+        if len(selected_ids_analysis) > ANALYSIS_DETAIL_MAX:
+            focus_id = st.sidebar.selectbox("🔍 자세히 볼 로스팅 (마커/이벤트 표시)", ["(없음)"] + selected_ids_analysis)
+    # 로스팅 요약표 (DB 저장분, 정렬/필터)
+    with perf.timed("summary") as info:
+        summary_df = get_summary().table(); info["rows"] = len(summary_df)
+    if not summary_df.empty:
+        with st.expander(f"📋 로스팅 요약 ({len(summary_df)}개)", expanded=False):
+            f1, f2 = st.columns(2)
+            with f1:
+                beans = sorted(summary_df['Bean'].dropna().astype(str).unique())
+                sel_beans = st.multiselect("원두", beans)
+            with f2:
+                dtr_range = st.slider("DTR (%)", 0.0, 50.0, (0.0, 50.0), step=0.5)
+            view = summary_df
+            if sel_beans: view = view[view['Bean'].isin(sel_beans)]
+            if dtr_range != (0.0, 50.0): view = view[view['DTR'].between(*dtr_range)]
+            st.dataframe(view, use_container_width=True, hide_index=True)
     else:
         st.info("데이터가 없습니다. CSV 파일을 업로드하세요.")
 
@@ -172,12 +215,34 @@ if is_analysis_mode:
 else:
     st.title("🔥 Professional Roasting")
     
+    # 비슷한 로스팅 검색 (현재 기록, 없으면 선택된 레퍼런스 기준)
+    if history_ids:
+        with st.sidebar.expander("🔎 비슷한 로스팅 찾기"):
+            align = st.selectbox("시간 정렬", ALIGNS, format_func=lambda a: {None: "없음", "charge": "Charge 기준", "tp": "TP 기준"}[a])
+            use_ror = st.checkbox("RoR 곡선도 비교")
+            k_nn = st.slider("개수", 3, 20, 5)
+            if st.button("검색", use_container_width=True):
+                base_ref = st.session_state.get('ref_select')
+                if st.session_state.get('roast'): q_df, exclude = st.session_state.roast.frame(), []
+                elif base_ref and base_ref != "(선택 안 함)": q_df, exclude = load_roasts([base_ref]).get(base_ref), [base_ref]
+                else: q_df, exclude = None, []
+                if q_df is None or q_df.empty: st.session_state.sim_results = None; st.warning("기록이나 레퍼런스가 없습니다.")
+                else:
+                    with st.spinner("검색 중..."):
+                        st.session_state.sim_results = get_similarity(align).sync().query(q_df, k=k_nn, use_ror=use_ror, exclude=exclude)
+            res = st.session_state.get('sim_results')
+            if res is not None:
+                if res.empty: st.caption("겹치는 구간이 충분한 로스팅이 없습니다.")
+                def set_ref(rid): st.session_state.ref_select = rid
+                for rid, dist in zip(res['Roast_ID'], res['Distance']):
+                    st.button(f"{rid}  (거리 {dist:.1f})", key=f"sim_{rid}", on_click=set_ref, args=(rid,), use_container_width=True)
+
     # 레퍼런스 선택
-    if not full_df.empty:
-        uids = list(full_df['Roast_ID'].unique())
+    if uids:
         ref_options = ["(선택 안 함)"] + uids
-        selected_ref = st.sidebar.selectbox("📉 배경 레퍼런스 선택 (Single Reference)", ref_options)
+        selected_ref = st.sidebar.selectbox("📉 배경 레퍼런스 선택 (Single Reference)", ref_options, key="ref_select")
         if selected_ref != "(선택 안 함)": reference_id_roasting = selected_ref
+    ror_window = st.sidebar.selectbox("📈 RoR 평활 구간", ROR_WINDOWS, format_func=lambda w: f"{w}초" if w else "원본 (샘플 간)")
     
     # 셋업
     with st.expander("1. 로스팅 설정 (Setup)", expanded=True):
@@ -190,7 +255,10 @@ else:
             initial_temp = st.number_input("투입온도 (℃)", min_value=0, max_value=300, value=200, step=10)
             green_weight = st.number_input("생두 무게(g)", 250.0)
 
-    if 'points' not in st.session_state: st.session_state.points = [] 
+    # 진행 중인 기록 (배열 기반 버퍼 - RoR/1C/DTR 은 점을 추가할 때 갱신됨)
+    if 'roast' not in st.session_state: st.session_state.roast = RoastSession(roast_id)
+    roast = st.session_state.roast
+    roast.roast_id = roast_id
     if 'start_time' not in st.session_state: st.session_state.start_time = None
     
     EVT = ["Charge", "TP", "Yellowing", "Cinnamon", "1C Start", "1C End", "2C", "Drop"]
@@ -209,7 +277,7 @@ else:
             else:
                 if st.button("⏹️ RESET (초기화)"):
                     st.session_state.start_time = None
-                    st.session_state.points = []
+                    roast.clear()
                     st.rerun()
         
         with t_col2:
@@ -235,15 +303,75 @@ else:
                     # 버튼 누른 순간의 정확한 시간 사용
                     rec_time = int(time.time() - st.session_state.start_time)
                     # 가스압은 이전 값을 가져오거나 0 (간소화)
-                    last_gas = st.session_state.points[-1]['Gas'] if st.session_state.points else 0.0
+                    last_gas = float(roast.last()['Gas']) if roast else 0.0
                     gas = st.number_input("가스(후입력)", 0.0, 15.0, last_gas, step=0.1, key="auto_gas")
                     
-                    st.session_state.points.append({
-                        "Time": rec_time, "Temp": temp, "Gas": gas, 
-                        "Event": evt if evt!="기록" else None, "Roast_ID": roast_id
-                    })
+                    roast.append(rec_time, temp, gas, evt if evt!="기록" else None)
+                    st.rerun()
+
+    # --- [D] 센서 스트리밍 모드: 백그라운드 스레드가 링버퍼를 채우고 그래프는 일정 간격으로만 갱신 ---
+    elif is_live_mode:
+        st.subheader("2. 실시간 기록 (Live Sensor)")
+        live = st.session_state.get('live')
+        with st.expander("센서 설정", expanded=live is None):
+            s1, s2, s3 = st.columns(3)
+            with s1: src_kind = st.selectbox("소스", LIVE_SOURCES)
+            with s2: hz = st.select_slider("샘플링 (Hz)", [1, 2, 3, 4, 5], value=1)
+            with s3: refresh_s = st.select_slider("그래프 갱신 (초)", [1, 2, 5], value=2)
+            if src_kind == "시리얼 (Serial)":
+                p1, p2 = st.columns(2)
+                with p1: serial_port = st.text_input("포트", "/dev/ttyUSB0")
+                with p2: baud = st.number_input("Baud", value=9600, step=1)
+            elif src_kind == "TCP":
+                p1, p2 = st.columns(2)
+                with p1: tcp_host = st.text_input("Host", "127.0.0.1")
+                with p2: tcp_port = st.number_input("Port", 1, 65535, 5000)
+            elif src_kind == "파일 재생 (Replay)":
+                replay_speed = st.number_input("배속", 1.0, 20.0, 1.0)
+                st.caption("사이드바에서 선택한 레퍼런스 로스팅을 재생합니다.")
+
+        t_col1, t_col2 = st.columns([1, 4])
+        with t_col1:
+            if live is None:
+                if st.button("▶️ START (시작)", type="primary"):
+                    try:
+                        if src_kind == "시리얼 (Serial)": source = SerialSource(serial_port, int(baud))
+                        elif src_kind == "TCP": source = TcpSource(tcp_host, tcp_port)
+                        elif src_kind == "파일 재생 (Replay)":
+                            ref_df = load_roasts([reference_id_roasting]).get(reference_id_roasting) if reference_id_roasting else None
+                            if ref_df is None or ref_df.empty: raise ValueError("재생할 레퍼런스를 먼저 선택하세요.")
+                            source = ReplaySource(ref_df, speed=replay_speed)
+                        else: source = SimulatorSource(charge=initial_temp)
+                    except Exception as e:
+                        st.error(f"센서 연결 실패: {e}")
+                    else:
+                        st.session_state.start_time = time.time()
+                        roast.clear()
+                        buf = RingBuffer(LIVE_BUFFER_SIZE)
+                        sampler = Sampler(source, buf, st.session_state.start_time, hz=hz, idle_timeout=LIVE_IDLE_TIMEOUT)
+                        sampler.start()
+                        st.session_state.live = {'buffer': buf, 'sampler': sampler, 'refresh': refresh_s}
+                        st.rerun()
+            else:
+                if st.button("⏹️ STOP (종료)"):
+                    stop_live()
                     st.rerun()
 
+        if live is not None:
+            c1, c2, c3 = st.columns([1, 2, 1])
+            with c1: gas = st.number_input("가스", 0.0, 15.0, 0.0, step=0.1, key="live_gas")
+            with c2: evt = st.selectbox("이벤트", EVT)
+            with c3:
+                st.write(""); st.write("")
+                if st.button("이벤트 기록", type="primary", use_container_width=True):
+                    # 이벤트는 start_time 기준으로 기록, 온도는 버퍼의 최신값
+                    rec_time = round(time.time() - st.session_state.start_time, 1)
+                    last = live['buffer'].latest()
+                    roast.append(rec_time, round(float(last[1]), 1) if last else initial_temp, gas, evt)
+            live['sampler'].gas = gas
+            live['sampler'].touch()
+            st.fragment(run_every=live['refresh'])(live_panel)(live)
+
     # --- [B] 수동 모드 로직 (기존 유지) ---
     else:
         st.subheader("2. 실시간 기록 (Manual Input)")
@@ -255,160 +383,95 @@ else:
         with c5:
             st.write(""); st.write("")
             if st.button("추가", type="primary", use_container_width=True):
-                st.session_state.points.append({"Time": t_sec, "Temp": temp, "Gas": gas, "Event": evt if evt!="기록" else None, "Roast_ID": roast_id})
+                roast.append(t_sec, temp, gas, evt if evt!="기록" else None)
 
     # 공통 데이터 에디터
-    if st.session_state.points:
+    if roast:
         st.markdown("##### 📝 데이터 수정")
-        edited = st.data_editor(pd.DataFrame(st.session_state.points), num_rows="dynamic", use_container_width=True, key="editor",
-                                column_config={"Event": st.column_config.SelectboxColumn("이벤트", options=EVT)})
-        if not pd.DataFrame(st.session_state.points).equals(edited):
-            st.session_state.points = edited.to_dict('records'); st.rerun()
+        # 기록이 바뀔 때마다 새 에디터(key) - 수정 내역만 콜백으로 받아 버퍼에 반영 (표 전체 비교 없음)
+        editor_key = f"editor_{roast.version}"
+        def apply_edits():
+            ed = st.session_state[editor_key]
+            roast.apply_edits(ed.get("edited_rows"), ed.get("added_rows"), ed.get("deleted_rows"))
+        st.data_editor(roast.frame()[["Time", "Temp", "Gas", "Event", "Roast_ID"]], num_rows="dynamic", use_container_width=True,
+                       key=editor_key, on_change=apply_edits, disabled=["Roast_ID"],
+                       column_config={"Event": st.column_config.SelectboxColumn("이벤트", options=EVT)})
 
 # ==========================================
 # 4. 통합 그래프
 # ==========================================
+perf.lap("mode_ui")
 st.write("---")
-fig, ax1 = plt.subplots(figsize=(12, 7))
-ax2 = ax1.twinx()
-ax_ror = ax1.twinx() 
-ax_ror.set_ylim(0, 150)
-ax_ror.axis('off')
-
-def plot_roast_data(ax_temp, ax_gas, ax_ror_bar, df, color_temp, color_gas, label_prefix, is_main=False, show_ror=False):
-    t_1c, t_2c, idx_1c = None, None, None
-    for i, row in df.iterrows():
-        e = str(row['Event']).lower()
-        if not e or e == "nan": continue
-        is_1c_evt, is_2c_evt = check_is_crack(e)
-        if is_1c_evt and t_1c is None: t_1c = row['Time']; idx_1c = i
-        if is_2c_evt and t_2c is None: t_2c = row['Time']
-
-    # 온도 선
-    final_c_temp = color_temp if (is_main or is_analysis_mode) else "#bdc3c7"
-    final_c_gas = color_gas if (is_main or is_analysis_mode) else "#bdc3c7"
-    line_style = '-' if (is_main or is_analysis_mode) else '--'
-    alpha_val = 0.9 if is_main else 0.7
-
-    if idx_1c is not None and (is_main or is_analysis_mode):
-        ax_temp.plot(df.iloc[:idx_1c+1]['Time'], df.iloc[:idx_1c+1]['Temp'], marker='o', markersize=6, color=final_c_temp, linewidth=2, label=label_prefix)
-        ax_temp.plot(df.iloc[idx_1c:]['Time'], df.iloc[idx_1c:]['Temp'], marker='o', markersize=6, color=final_c_temp, linewidth=8, alpha=alpha_val)
-    else:
-        marker = 'o' if (is_main or is_analysis_mode) else None
-        ax_temp.plot(df['Time'], df['Temp'], marker=marker, markersize=5, linestyle=line_style, color=final_c_temp, linewidth=2, label=label_prefix, alpha=alpha_val)
-
-    # 가스압
-    if (is_main or is_analysis_mode) and 'Gas' in df.columns and df['Gas'].sum() > 0:
-        ax_gas.plot(df['Time'], df['Gas'], drawstyle='steps-post', marker='x', markersize=5, linestyle=':', color=final_c_gas, alpha=0.5, label='Gas' if is_main else None)
-
-    # [핵심] RoR Zone Bar + 수치 표시
-    if show_ror and len(df) > 1:
-        prev_ror = 0
-        for i in range(1, len(df)):
-            curr = df.iloc[i]; prev = df.iloc[i-1]
-            dt = (curr['Time'] - prev['Time']) / 60.0
-            dtemp = curr['Temp'] - prev['Temp']
-            if dt > 0:
-                ror = dtemp / dt
-                c = "#2ecc71" # Green
-                if ror < 5: c = "#3498db" # Blue
-                elif ror > prev_ror + 2: c = "#e74c3c" # Red
-                
-                # Bar 그리기
-                bar_x = curr['Time'] - (curr['Time']-prev['Time'])/2
-                ax_ror_bar.bar(bar_x, ror, width=(curr['Time']-prev['Time']), color=c, alpha=0.6)
-                
-                # [추가] RoR 숫자 표시 (값이 3 이상일 때만, 너무 겹치지 않게)
-                if ror > 3:
-                    ax_ror_bar.text(bar_x, ror + 2, f"{ror:.1f}", ha='center', va='bottom', fontsize=8, color=c, fontweight='bold')
-                
-                prev_ror = ror
-
-    # 이벤트
-    if is_main or is_analysis_mode:
-        event_points = []
-        for _, row in df.iterrows():
-            e = str(row['Event'])
-            if e and e != "nan" and e != "None": event_points.append(row)
-
-        for i, row in enumerate(event_points):
-            e = str(row['Event']); label_text = e
-            is_drop = "drop" in e.lower() or "배출" in e
-            
-            if is_drop:
-                if t_2c: label_text = f"Drop (+2C {format_mmss(row['Time']-t_2c)})"
-                elif t_1c: label_text = f"Drop (+1C {format_mmss(row['Time']-t_1c)})"
-            
-            is_1c_evt, is_2c_evt = check_is_crack(e)
-            y_offset = 25 if i % 2 == 0 else -30 
-            va_align = 'bottom' if i % 2 == 0 else 'top'
-            
-            if is_1c_evt or is_2c_evt:
-                box_props = dict(boxstyle="round,pad=0.4", fc="gold", ec="black", alpha=1.0)
-                ax_temp.scatter(row['Time'], row['Temp'], marker='*', s=400, facecolors=final_c_temp, edgecolors='black', linewidths=1.5, zorder=10)
-                ax_temp.annotate(label_text, (row['Time'], row['Temp']), xytext=(0, 20), textcoords='offset points', ha='center', weight='bold', color='black', fontsize=11, bbox=box_props)
-            elif is_drop:
-                box_props = dict(boxstyle="round,pad=0.4", fc="#9b59b6", ec="black", alpha=1.0)
-                ax_temp.annotate(label_text, (row['Time'], row['Temp']), xytext=(0, 35), textcoords='offset points', ha='center', weight='bold', color='white', fontsize=11, bbox=box_props, arrowprops=dict(arrowstyle="-", color='purple'))
-            else:
-                box_props = dict(boxstyle="round,pad=0.3", fc="white", ec=final_c_temp, alpha=0.9)
-                ax_temp.annotate(label_text, (row['Time'], row['Temp']), xytext=(0, y_offset), textcoords='offset points', ha='center', va=va_align, color='black', fontsize=10, bbox=box_props, arrowprops=dict(arrowstyle="-", color=final_c_temp))
+chart_cache = get_chart_cache()
+# 저장소/업로드 파일이 바뀌면 key 가 달라져서 캐시된 그림을 쓰지 않음
+data_ver = (store.version, tuple(f.file_id for f in uploaded_files or []))
+chart_style = (tuple(plt.rcParams['font.family']), CHART_DPI)
 
 # 그래프 실행
 if is_analysis_mode:
-    if selected_ids_analysis and not full_df.empty:
-        colors = plt.cm.tab10.colors 
-        for i, pid in enumerate(selected_ids_analysis):
-            p = full_df[full_df['Roast_ID'] == pid].sort_values('Time').reset_index(drop=True)
-            if not p.empty:
-                c = colors[i % len(colors)]
-                plot_roast_data(ax1, ax2, ax_ror, p, c, c, f'{pid}', is_main=True, show_ror=False)
+    # 같은 선택(+ 같은 데이터/스타일)이면 로드/그리기 없이 저장된 PNG 를 그대로 사용
+    def render_analysis():
+        fig, ax1, ax2, ax_ror = new_roast_figure()
+        if selected_ids_analysis:
+            sel_roasts = load_roasts(selected_ids_analysis)
+            colors = plt.cm.tab10.colors if len(selected_ids_analysis) <= 10 else plt.cm.tab20.colors
+            plot_roast_overlay(ax1, ax2, ax_ror, {pid: sel_roasts.get(pid) for pid in selected_ids_analysis}, colors,
+                               focus=focus_id, detail_max=ANALYSIS_DETAIL_MAX)
+        finish_roast_figure(ax1, ax2)
+        try: return render_png(fig)
+        finally: plt.close(fig)
+    chart_png = chart_cache.png(("analysis", tuple(selected_ids_analysis), focus_id, ANALYSIS_DETAIL_MAX, data_ver, chart_style), render_analysis)
 else:
-    # 로스팅 모드 (Manual / Auto)
-    if reference_id_roasting and not full_df.empty:
-        ref_data = full_df[full_df['Roast_ID'] == reference_id_roasting].sort_values('Time').reset_index(drop=True)
-        if not ref_data.empty:
-            plot_roast_data(ax1, ax2, ax_ror, ref_data, '#bdc3c7', '#bdc3c7', f'Ref: {reference_id_roasting}', is_main=False, show_ror=False)
-
-    if st.session_state.points:
-        curr_df = pd.DataFrame(st.session_state.points).sort_values('Time').reset_index(drop=True)
-        plot_roast_data(ax1, ax2, ax_ror, curr_df, '#c0392b', '#2980b9', f'Current: {roast_id}', is_main=True, show_ror=True)
+    # 로스팅 모드 (Manual / Auto): 레퍼런스 곡선 + 축은 배경 레이어로 재사용, 현재 로스팅만 매번 그림
+    live_now = is_live_mode and st.session_state.get('live')
+    def render_roast():
+        fig, ax1, ax2, ax_ror = new_roast_figure()
+        if reference_id_roasting:
+            ref_data = load_roasts([reference_id_roasting]).get(reference_id_roasting)
+            if ref_data is not None and not ref_data.empty:
+                plot_roast_data(ax1, ax2, ax_ror, ref_data, '#bdc3c7', '#bdc3c7', f'Ref: {reference_id_roasting}', is_main=False, show_ror=False, analysis_mode=is_analysis_mode)
+        mark = background_mark(fig)
+        curr_df = merge_live_points(st.session_state.live['buffer'], roast) if live_now else roast.frame()
+        if not curr_df.empty:
+            plot_roast_data(ax1, ax2, ax_ror, curr_df, '#c0392b', '#2980b9', f'Current: {roast_id}', is_main=True, show_ror=True, ror_window=ror_window, analysis_mode=is_analysis_mode)
+        finish_roast_figure(ax1, ax2)
+        try: return chart_cache.layered(fig, mark, ("ref", reference_id_roasting, data_ver, chart_style))
+        finally: plt.close(fig)
+    # 기록이 그대로인 rerun(다른 위젯 조작 등)은 이 세션에서 마지막으로 그린 PNG 재사용 (센서 모드는 매번 새 점)
+    chart_key = None if live_now else (reference_id_roasting, data_ver, chart_style, roast_id, roast.version, ror_window)
+    last_chart = st.session_state.get('last_chart')
+    if chart_key is not None and last_chart and last_chart[0] == chart_key: chart_png = last_chart[1]
+    else:
+        chart_png = render_roast()
+        st.session_state.last_chart = (chart_key, chart_png)
 
-ax1.set_xlabel("Time (sec)"); ax1.set_ylabel("Temp (C)", color='#c0392b'); ax2.set_ylabel("Gas", color='#2980b9')
-ax2.set_ylim(0, 10); ax1.grid(True, ls='--', alpha=0.5); ax1.legend(loc='upper left')
-st.pyplot(fig)
+perf.lap("plot")
+st.image(chart_png, width="stretch")
+perf.lap("image")
 
 # --- [공통] 저장 섹션 & DTR 평가 ---
 if not is_analysis_mode:
     st.subheader("3. 저장 (Save)")
     c1, c2, c3 = st.columns([1, 2, 1])
     calc_E = None
+    energy_kj = None
     
     # DTR 자동 계산 (평가용)
     current_dtr = 0
     dtr_feedback = ""
-    if st.session_state.points:
-        df = pd.DataFrame(st.session_state.points).sort_values('Time')
-        # 1차 팝과 마지막 시간 찾기
-        t_1c = None
-        for _, r in df.iterrows():
-            if check_is_crack(str(r['Event']))[0]: # 1차 팝
-                t_1c = r['Time']
-                break
-        
-        if t_1c and df.iloc[-1]['Time'] > t_1c:
-            total_time = df.iloc[-1]['Time']
-            dev_time = total_time - t_1c
-            current_dtr = (dev_time / total_time) * 100
+    if roast:
+        # 1차 팝과 마지막 시간 기준 (점을 추가할 때 갱신된 값)
+        _, _, dtr = roast.dtr()
+        if dtr is not None:
+            current_dtr = dtr
             dtr_feedback = get_dtr_feedback(current_dtr)
 
     with c1:
         rw = st.number_input("배출무게 (g)", 0.0)
         if rw>0 and green_weight>0:
-            lw = green_weight - rw
-            last_t = st.session_state.points[-1]['Temp'] if st.session_state.points else initial_temp
-            q = (lw*2260 + rw*1.6*(last_t-25))/1000
-            calc_E = f"{q:.1f} kJ"; st.info(f"🔥 열량: {calc_E}")
+            last_t = roast.last()['Temp'] if roast else initial_temp
+            q = roast_energy_kj(green_weight, rw, last_t)
+            calc_E = f"{q:.1f} kJ"; energy_kj = round(q, 1); st.info(f"🔥 열량: {calc_E}")
 
     with c2: 
         note = st.text_input("메모", placeholder="맛, 날씨, 특이사항")
@@ -417,7 +480,8 @@ if not is_analysis_mode:
 
     with c3:
         st.write(""); st.write("")
-        if st.session_state.points:
+        if roast:
+            sdf = roast.frame()
             # [신규] DTR 평가 메시지 표시 (저장 버튼 위)
             if dtr_feedback:
                 st.markdown(f"""
@@ -426,18 +490,44 @@ if not is_analysis_mode:
                 </div>
                 """, unsafe_allow_html=True)
 
-            sdf = pd.DataFrame(st.session_state.points)
             buf = io.StringIO()
             buf.write(f"파일 이름,{save_name}\n날짜,{get_intl_date_str()}\n원두 이름,{bean_name}\n결과무게,{rw}\n흡수열량,{calc_E}\n비고,{note}\n\n")
-            sdf[['Time','Temp','Gas','Event']].rename(columns={'Time':'Time(sec)','Temp':'Temp(C)'}).to_csv(buf, index=False)
+            edf = sdf[['Time','Temp','Gas','Event']].rename(columns={'Time':'Time(sec)','Temp':'Temp(C)'})
+            # 세션은 float 로 들고 있으므로 정수뿐인 시간/온도는 예전처럼 정수로 기록 (200.0 -> 200)
+            for c in ('Time(sec)', 'Temp(C)'):
+                v = edf[c].to_numpy()
+                if np.isfinite(v).all() and (v == np.round(v)).all(): edf[c] = edf[c].astype('Int64')
+            edf.to_csv(buf, index=False)
             csv_d = buf.getvalue().encode('utf-8-sig')
             
             def save():
-                sdf['Roast_ID'] = roast_id
-                m = 'a' if os.path.exists(DEFAULT_DATA_FILE) else 'w'
-                h = not os.path.exists(DEFAULT_DATA_FILE)
-                sdf.to_csv(DEFAULT_DATA_FILE, mode=m, header=h, index=False, encoding='utf-8-sig')
-                st.session_state.points = []; st.success("저장 완료!")
+                try: get_writer().submit(sdf.assign(Roast_ID=roast_id)).result(timeout=30)
+                except Exception as e:
+                    st.error(f"저장 실패: {e}"); return
+                get_summary().update([roast_id], extra={"Bean": bean_name, "Energy_kJ": energy_kj})
+                roast.clear(); st.success("저장 완료!")
             
             st.download_button("💾 CSV 저장 및 다운로드", csv_d, f"{save_name}.csv", "text/csv", type="primary", on_click=save, use_container_width=True)
         else: st.button("💾 CSV 저장", disabled=True, use_container_width=True)
+
+# ==========================================
+# 5. 성능 기록 (rerun 단계별 시간 / 메모리)
+# ==========================================
+perf.lap("save_ui")
+rec = perf.record(mode=mode, history=len(history_ids), uploads=len(all_uploads), profiled=prof is not None)
+if prof is not None:
+    st.session_state.last_profile = stop_profile(prof, os.path.join(os.path.dirname(PERF_LOG_FILE), 'last_rerun.prof'))
+    st.session_state.active_profile = None
+try: get_perf_log().write(rec)
+except OSError: pass
+
+if DEBUG_PANEL or st.query_params.get('debug') == '1':
+    with st.sidebar.expander("⏱️ 성능 (디버그)"):
+        st.caption(f"이번 rerun {rec['total_ms']:.0f} ms · 메모리 {rec['rss_mb']} MB")
+        st.dataframe(pd.DataFrame(rec['stages'] + [dict(t, name=f"└ {t['name']}") for t in rec['timed']]), hide_index=True, use_container_width=True)
+        recent = get_perf_log().read(50)
+        cc = get_chart_cache(); st.caption(f"그래프 캐시 {len(cc)}개 · 적중 {cc.hits} · 미스 {cc.misses}")
+        if recent: st.caption(f"최근 {len(recent)}회: 중앙값 {np.median([r['total_ms'] for r in recent]):.0f} ms · 최대 {max(r['total_ms'] for r in recent):.0f} ms")
+        def profile_next(): st.session_state.profile_next = True
+        st.button("🔬 다음 rerun 프로파일 (cProfile)", on_click=profile_next, use_container_width=True)
+        if st.session_state.get('last_profile'): st.code(st.session_state.last_profile, language=None)
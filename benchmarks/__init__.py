@@ -0,0 +1 @@
+"""성능 측정 스위트 (python -m benchmarks.run)"""
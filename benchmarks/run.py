@@ -0,0 +1,216 @@
+"""성능 측정 스위트
+
+    python -m benchmarks.run [--scales 100,10000] [--repeat 5] [--out result.json] [--compare base.json]
+
+- 모든 데이터는 고정 seed 로 생성하므로 실행 간 결과를 비교할 수 있음
+- 각 항목은 repeat 회 실행한 중앙값(ms)
+- --compare 로 이전 결과와 비교해서 threshold 배 이상 느려진 항목이 있으면 종료 코드 1
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from roast_core import (RoastIndex, RoastSession, RoastStore, compute_dtr, compute_dtr_frame, load_and_standardize_csv, open_store,
+                        summarize, with_event_columns)
+from roast_plot import (OVERLAY_DETAIL_MAX, ChartCache, background_mark, finish_roast_figure, new_roast_figure, plot_roast_data,
+                        plot_roast_overlay)
+
+from . import synth
+
+DEFAULT_SCALES = [100, 10000]  # 100000 은 --scales 로 지정 (생성에 시간이 걸림)
+
+
+def timeit(fn, repeat=5, setup=None):
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def bench_ingest(results, repeat):
+    """업로드 파싱: 샘플링 속도 x 구분자 x 인코딩 x 헤더 언어 별 파일 1개당 시간"""
+    by_variant = {}
+    for name, fname, data in synth.log_variants(per_variant=4):
+        by_variant.setdefault(name, []).append((fname, data))
+    for name, files in by_variant.items():
+        parsed = [load_and_standardize_csv(io.BytesIO(d), f) for f, d in files]
+        ms = timeit(lambda: [load_and_standardize_csv(io.BytesIO(d), f) for f, d in files], repeat) / len(files)
+        results[f"ingest/{name}"] = {"ms": ms, "parsed": sum(p is not None and not p.empty for p in parsed), "files": len(files)}
+
+
+def bench_render(results, repeat):
+    """plot_roast_data + PNG 변환 (st.pyplot 과 같은 단계)"""
+    rng = np.random.default_rng(1)
+    for hz in (1.0, 5.0):
+        df = synth.roast_curve(rng, hz=hz)
+        def run():
+            fig, ax1, ax2, ax_ror = new_roast_figure()
+            plot_roast_data(ax1, ax2, ax_ror, df, '#c0392b', '#2980b9', 'Current', is_main=True, show_ror=True)
+            finish_roast_figure(ax1, ax2)
+            fig.savefig(io.BytesIO(), format="png"); plt.close(fig)
+        results[f"render/current_{hz:g}Hz"] = {"ms": timeit(run, repeat), "rows": len(df)}
+    roasts = [synth.roast_curve(rng, hz=1.0, events="full") for _ in range(10)]
+    def run_overlay():
+        fig, ax1, ax2, ax_ror = new_roast_figure()
+        for i, df in enumerate(roasts):
+            c = plt.cm.tab10.colors[i % 10]
+            plot_roast_data(ax1, ax2, ax_ror, df, c, c, f"R{i}", is_main=True, analysis_mode=True)
+        finish_roast_figure(ax1, ax2)
+        fig.savefig(io.BytesIO(), format="png"); plt.close(fig)
+    results["render/analysis_10x1Hz"] = {"ms": timeit(run_overlay, repeat), "rows": sum(map(len, roasts))}
+    # 30개 겹쳐 그리기: 로스팅마다 plot_roast_data vs plot_roast_overlay (LineCollection + 다운샘플)
+    for hz in (1.0, 5.0):
+        many = {f"R{i}": synth.roast_curve(rng, hz=hz, events="full") for i in range(30)}
+        def run_many(detail_max):
+            fig, ax1, ax2, ax_ror = new_roast_figure()
+            plot_roast_overlay(ax1, ax2, ax_ror, many, plt.cm.tab20.colors, detail_max=detail_max)
+            finish_roast_figure(ax1, ax2)
+            fig.savefig(io.BytesIO(), format="png"); plt.close(fig)
+        rows = sum(map(len, many.values()))
+        results[f"render/analysis_30x{hz:g}Hz_full"] = {"ms": timeit(lambda: run_many(len(many)), max(1, repeat // 2)), "rows": rows}
+        results[f"render/analysis_30x{hz:g}Hz_overlay"] = {"ms": timeit(lambda: run_many(OVERLAY_DETAIL_MAX), repeat), "rows": rows}
+    # 로스팅 중 rerun 1회 그래프: 레퍼런스 + 현재 기록 40점. st.pyplot 과 같은 savefig vs 배경 레이어 재사용
+    ref, cur = synth.roast_curve(rng, hz=1.0), synth.roast_curve(rng, hz=0.1).iloc[:40]
+    def roast_fig():
+        fig, ax1, ax2, ax_ror = new_roast_figure()
+        plot_roast_data(ax1, ax2, ax_ror, ref, '#bdc3c7', '#bdc3c7', 'Ref', is_main=False)
+        mark = background_mark(fig)
+        plot_roast_data(ax1, ax2, ax_ror, cur, '#c0392b', '#2980b9', 'Current', is_main=True, show_ror=True)
+        finish_roast_figure(ax1, ax2)
+        return fig, mark
+    def run_pyplot():
+        fig, _ = roast_fig()
+        fig.savefig(io.BytesIO(), bbox_inches="tight", dpi=200, format="png"); plt.close(fig)
+    cache = ChartCache()
+    def run_layered():
+        fig, mark = roast_fig()
+        cache.layered(fig, mark, "ref"); plt.close(fig)
+    run_layered()  # 배경 레이어 준비
+    rows = len(ref) + len(cur)
+    results["render/roast_ref_pyplot"] = {"ms": timeit(run_pyplot, repeat), "rows": rows}
+    results["render/roast_ref_layered"] = {"ms": timeit(run_layered, repeat), "rows": rows}
+
+
+def bench_dtr(results, repeat):
+    rng = np.random.default_rng(2)
+    for hz in (1.0, 5.0):
+        pts = synth.roast_curve(rng, hz=hz).assign(Roast_ID="cur").to_dict("records")
+        results[f"dtr/points_{hz:g}Hz"] = {"ms": timeit(lambda: compute_dtr(pts), repeat), "rows": len(pts)}
+        frame = with_event_columns(pd.DataFrame(pts))
+        results[f"dtr/frame_{hz:g}Hz"] = {"ms": timeit(lambda: compute_dtr_frame(frame), repeat), "rows": len(pts)}
+
+
+def bench_session(results, repeat):
+    """로스팅 중 rerun 1회 비용: 점 1개 추가 후 그래프/DTR 용 DataFrame 준비 (dict 리스트 방식 vs RoastSession)"""
+    rng = np.random.default_rng(4)
+    for hz in (1.0, 5.0):
+        pts = synth.roast_curve(rng, hz=hz).assign(Roast_ID="cur").to_dict("records")
+        def old_rerun():
+            df = pd.DataFrame(pts).sort_values("Time").reset_index(drop=True)
+            return with_event_columns(df), compute_dtr(pts)
+        results[f"session/list_rerun_{hz:g}Hz"] = {"ms": timeit(old_rerun, repeat), "rows": len(pts)}
+        sess = RoastSession("cur")
+        sess.extend(pts[:-1])
+        last = pts[-1]
+        def new_rerun():
+            sess.append(last["Time"], last["Temp"], last["Gas"], last["Event"])
+            return sess.frame(), sess.dtr(), sess.last_ror()
+        results[f"session/buffer_rerun_{hz:g}Hz"] = {"ms": timeit(new_rerun, repeat), "rows": len(pts)}
+
+
+def bench_scale(results, n, repeat, workdir):
+    """n 개 로스팅 DB 기준: 히스토리 로드/병합, 로스팅별 필터, DTR 일괄 계산, 저장(append)"""
+    hist = synth.history_frame(n, seed=n)
+    root = os.path.join(workdir, f"db_{n}")
+    RoastStore(root).append(hist)
+    ids = list(pd.unique(hist["Roast_ID"]))
+    pick = [ids[i] for i in np.random.default_rng(3).choice(len(ids), min(10, len(ids)), replace=False)]
+    uploads = [synth.history_frame(1, seed=100 + i).assign(Roast_ID=f"Up{i}") for i in range(20)]
+    tag = f"n={n}"
+
+    results[f"{tag}/history/manifest"] = {"ms": timeit(lambda: RoastStore(root).roast_ids(), repeat), "roasts": n}
+    results[f"{tag}/history/read_all"] = {"ms": timeit(lambda: RoastStore(root).read(), repeat), "rows": len(hist)}
+    results[f"{tag}/history/concat_uploads"] = {"ms": timeit(lambda: pd.concat([hist] + uploads, ignore_index=True), repeat)}
+
+    # 로스팅 10개 선택: 전체 표 마스크(예전 방식) vs 인덱스 vs 저장소에서 선택분만 읽기
+    results[f"{tag}/select10/mask"] = {"ms": timeit(lambda: [hist[hist["Roast_ID"] == p].sort_values("Time") for p in pick], repeat)}
+    index = RoastIndex(hist)
+    results[f"{tag}/select10/index_get"] = {"ms": timeit(lambda: [index.get(p) for p in pick], repeat)}
+    results[f"{tag}/select10/index_build"] = {"ms": timeit(lambda: RoastIndex(hist), max(1, repeat // 2))}
+    store = RoastStore(root)
+    results[f"{tag}/select10/store_read"] = {"ms": timeit(lambda: store.read(pick), repeat)}
+
+    results[f"{tag}/dtr/summarize_all"] = {"ms": timeit(lambda: summarize(hist), max(1, repeat // 2)), "roasts": n}
+
+    # save(): 로스팅 1개 추가 (매번 새 Roast_ID)
+    one = synth.history_frame(1, seed=7, hz=1.0)
+    counter = iter(range(10 ** 6))
+    save_store = open_store(root)
+    results[f"{tag}/save/append_one"] = {"ms": timeit(lambda: save_store.append(one.assign(Roast_ID=f"New{next(counter)}")), repeat)}
+
+
+def compare(results, base_path, threshold):
+    with open(base_path, encoding="utf-8") as f: base = json.load(f)["results"]
+    slower = []
+    print(f"\n== {base_path} 대비 ==")
+    for k, v in results.items():
+        if k not in base or not base[k]["ms"]: continue
+        ratio = v["ms"] / base[k]["ms"]
+        flag = " <-- 느려짐" if ratio > threshold else ""
+        print(f"{k:<45} {base[k]['ms']:9.2f} -> {v['ms']:9.2f} ms  x{ratio:5.2f}{flag}")
+        if flag: slower.append(k)
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.run", description="로스팅 앱 성능 측정")
+    ap.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="DB 로스팅 수 (쉼표 구분, 예: 100,10000,100000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", help="이 문자열이 들어간 그룹만 실행 (ingest, render, dtr, session, n=)")
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    ap.add_argument("--compare", help="비교할 이전 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=1.25, help="이 배수 이상 느려지면 회귀로 판단")
+    args = ap.parse_args(argv)
+
+    results = {}
+    groups = [("ingest", bench_ingest), ("render", bench_render), ("dtr", bench_dtr), ("session", bench_session)]
+    for name, fn in groups:
+        if not args.only or args.only in name:
+            t0 = time.perf_counter(); fn(results, args.repeat)
+            print(f"[{name}] {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in [int(x) for x in args.scales.split(",") if x]:
+            if args.only and args.only not in f"n={n}": continue
+            t0 = time.perf_counter(); bench_scale(results, n, args.repeat, workdir)
+            print(f"[n={n}] {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    for k, v in results.items():
+        extra = "  ".join(f"{a}={b}" for a, b in v.items() if a != "ms")
+        print(f"{k:<45} {v['ms']:9.2f} ms  {extra}")
+
+    if args.out:
+        meta = {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": args.repeat}
+        with open(args.out, "w", encoding="utf-8") as f: json.dump({"meta": meta, "results": results}, f, indent=1, ensure_ascii=False)
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""가상 로스팅 로그 생성기 - 샘플링 속도, 길이, 이벤트 구성, 구분자, 인코딩을 바꿔가며 생성"""
+import io
+
+import numpy as np
+import pandas as pd
+
+DELIMITERS = [",", "\t", ";"]
+ENCODINGS = ["utf-8-sig", "cp949"]
+EVENT_SETS = {
+    "full": ["Charge", "TP", "Yellowing", "Cinnamon", "1C Start", "1C End", "2C", "Drop"],
+    "minimal": ["Charge", "Drop"],
+    "korean": ["투입", "TP", "옐로잉", "1차 팝", "배출"],
+    "none": [],
+}
+HEADERS = {
+    "en": ["Time(sec)", "Temp(C)", "Gas", "Event"],
+    "ko": ["시간(초)", "온도", "가스", "이벤트"],
+}
+
+
+def roast_curve(rng, hz=1.0, length_s=720.0, charge=200.0, events="full"):
+    """투입 -> TP -> 점점 느려지는 상승 곡선 + 가스 단계 + 이벤트 (Time, Temp, Gas, Event)"""
+    t = np.arange(0.0, length_s + 1e-9, 1.0 / hz)
+    tp_time = rng.uniform(50, 80)
+    tp = rng.uniform(80, 100)
+    rise = rng.uniform(105, 125)
+    temp = np.where(t < tp_time, tp + (charge - tp) * np.exp(-4 * t / tp_time),
+                    tp + rise * (1 - np.exp(-(t - tp_time) / rng.uniform(350, 450))))
+    temp = np.round(temp + rng.normal(0, 0.3, len(t)), 1)
+    gas = np.round(np.select([t < 240, t < 480], [5.0, 3.5], 1.5), 1)
+    ev = np.full(len(t), "", dtype=object)
+    names = EVENT_SETS[events]
+    if names:
+        # 이벤트는 곡선 구간에 고르게 배치 (첫 이벤트 = 투입, 마지막 = 배출)
+        pos = np.linspace(0, len(t) - 1, len(names)).astype(int)
+        pos[1:-1] = np.clip(pos[1:-1], 1, len(t) - 2)
+        ev[pos] = names
+    return pd.DataFrame({"Time": np.round(t, 2), "Temp": temp, "Gas": gas, "Event": ev})
+
+
+def roast_log_bytes(df, bean="Geisha", delimiter=",", encoding="utf-8-sig", lang="en", meta=True):
+    """로거/템플릿 형식 CSV 바이트 (메타데이터 줄 + 헤더 + 데이터)"""
+    buf = io.StringIO()
+    if meta:
+        buf.write(f"파일 이름{delimiter}{bean}_log\n날짜{delimiter}2026-Jan-01\n원두 이름{delimiter}{bean}\n비고{delimiter}synthetic\n\n")
+    out = df.copy()
+    out.columns = HEADERS[lang]
+    out.to_csv(buf, sep=delimiter, index=False)
+    return buf.getvalue().encode(encoding, errors="ignore")
+
+
+def log_variants(seed=0, per_variant=5, hz_list=(1.0, 5.0), length_s=720.0):
+    """(이름, 파일명, 바이트) 목록 - 샘플링 x 구분자 x 인코딩 x 헤더 언어 x 이벤트 구성 조합"""
+    rng = np.random.default_rng(seed)
+    out = []
+    ev_names = list(EVENT_SETS)
+    for hz in hz_list:
+        for delim in DELIMITERS:
+            for enc in ENCODINGS:
+                for lang in HEADERS:
+                    name = f"{hz:g}Hz/{'tab' if delim == chr(9) else delim}/{enc}/{lang}"
+                    for i in range(per_variant):
+                        df = roast_curve(rng, hz=hz, length_s=length_s, events=ev_names[i % len(ev_names)])
+                        data = roast_log_bytes(df, bean=f"Bean{i}", delimiter=delim, encoding=enc, lang=lang)
+                        out.append((name, f"log_{len(out)}.csv", data))
+    return out
+
+
+def history_frame(n_roasts, seed=0, hz=0.2, length_s=(600.0, 900.0)):
+    """DB 에 넣을 n 개 로스팅 (Time, Temp, Gas, Event, Roast_ID) - 한 번에 벡터 연산으로 생성"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(*length_s, n_roasts)
+    counts = (lengths * hz).astype(int) + 1
+    rid = np.repeat(np.arange(n_roasts), counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    t = (np.arange(counts.sum()) - np.repeat(starts, counts)) / hz
+    tp_time = rng.uniform(50, 80, n_roasts)[rid]
+    tp = rng.uniform(80, 100, n_roasts)[rid]
+    rise = rng.uniform(105, 125, n_roasts)[rid]
+    charge = rng.uniform(190, 210, n_roasts)[rid]
+    temp = np.where(t < tp_time, tp + (charge - tp) * np.exp(-4 * t / tp_time),
+                    tp + rise * (1 - np.exp(-(t - tp_time) / 400)))
+    temp = np.round(temp + rng.normal(0, 0.3, len(t)), 1)
+    gas = np.round(np.select([t < 240, t < 480], [5.0, 3.5], 1.5), 1)
+    ev = np.full(len(t), "", dtype=object)
+    ends = starts + counts - 1
+    ev[starts] = "Charge"
+    ev[starts + np.minimum(counts - 1, (tp_time[starts] * hz).astype(int))] = "TP"
+    ev[starts + (counts * 0.8).astype(int)] = "1C Start"
+    ev[ends] = "Drop"
+    beans = np.array(["Geisha", "Bourbon", "Caturra", "Typica", "SL28"])
+    ids = np.char.add(np.char.add(beans[np.arange(n_roasts) % len(beans)], "_"), np.arange(n_roasts).astype(str))
+    return pd.DataFrame({"Time": t, "Temp": temp, "Gas": gas, "Event": ev, "Roast_ID": ids[rid]})
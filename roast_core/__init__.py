@@ -0,0 +1,42 @@
+"""Roasting_App 의 Streamlit/matplotlib 비의존 로직 (파싱, RoR, DTR, 열량, DB)
+
+import 비용을 줄이기 위해 하위 모듈은 이름을 처음 쓸 때 불러옴 (pandas/pyarrow 등은 필요할 때만 로드).
+"""
+import importlib
+
+_EXPORTS = {
+    "EVENT_COLUMNS": "events", "EVENT_KINDS": "events", "check_is_crack": "events", "classify_events": "events",
+    "event_flags": "events", "event_kind": "events",
+    "with_event_columns": "events",
+    "RoastIndex": "index",
+    "IngestCache": "ingest_cache", "content_key": "ingest_cache",
+    "ReplaySource": "live", "RingBuffer": "live", "Sampler": "live", "SerialSource": "live",
+    "SimulatorSource": "live", "TcpSource": "live", "parse_reading": "live",
+    "downsample": "lod", "lttb": "lod", "minmax_downsample": "lod",
+    "compute_dtr": "metrics", "compute_dtr_frame": "metrics", "format_mmss": "metrics", "get_dtr_feedback": "metrics",
+    "get_intl_date_str": "metrics", "roast_energy_kj": "metrics",
+    "PerfLog": "perf", "RerunTimer": "perf", "rss_mb": "perf", "start_profile": "perf", "stop_profile": "perf",
+    "PARSER_VERSION": "parsing", "RoastParseError": "parsing", "get_template_csv": "parsing", "load_and_standardize_csv": "parsing",
+    "parse_roast_csv": "parsing",
+    "ROR_WINDOWS": "ror", "RoR": "ror", "compute_ror": "ror", "ror_bar_verts": "ror",
+    "ALIGNS": "similarity", "SimilarityIndex": "similarity", "resample_curve": "similarity",
+    "resample_many": "similarity",
+    "RoastStore": "store", "RoastWriter": "store", "StoreLock": "store",
+    "normalize_frame": "store", "open_store": "store",
+    "RoastSession": "session",
+    "SUMMARY_COLUMNS": "summary", "SummaryTable": "summary", "summarize": "summary",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    mod = _EXPORTS.get(name)
+    if mod is None: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{mod}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
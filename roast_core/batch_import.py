@@ -0,0 +1,113 @@
+"""로거 CSV 일괄 가져오기 (Streamlit 없이 실행)
+
+    python -m roast_core.batch_import <폴더> [--db saemmulter_roasting_db] [--workers 8] [--report rejected.csv]
+
+파싱은 프로세스 풀에서 병렬로, DB 쓰기는 메인 프로세스 한 곳에서 묶어서 처리함.
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .ingest_cache import content_key
+
+DEFAULT_DB_DIR = "saemmulter_roasting_db"
+DEFAULT_LEGACY_CSV = "saemmulter_roasting_db.csv"
+WRITE_BATCH = 1000  # 한 번에 저장소에 쓰는 로스팅 수
+
+
+def find_logs(root, exts=(".csv",)):
+    for dirpath, _, names in os.walk(root):
+        for name in sorted(names):
+            if name.lower().endswith(exts): yield os.path.join(dirpath, name)
+
+
+def _parse_one(path):
+    """워커: (path, 내용 해시, DataFrame 또는 None, 거부 사유)"""
+    from .parsing import parse_roast_csv
+    try:
+        with open(path, "rb") as f: raw = f.read()
+    except OSError as e:
+        return path, None, None, f"읽기 실패: {e}"
+    digest = content_key(raw)
+    try:
+        df = parse_roast_csv(io.BytesIO(raw), os.path.basename(path))
+    except Exception as e:
+        return path, digest, None, str(e) or type(e).__name__
+    if df.empty: return path, digest, None, "유효한 Time/Temp 행 없음"
+    return path, digest, df, None
+
+
+def run_import(root, db_dir=DEFAULT_DB_DIR, legacy_csv=DEFAULT_LEGACY_CSV, workers=None, on_duplicate_id="skip",
+               update_summary=True, log=print):
+    """폴더 전체를 가져와서 {'imported': [...], 'rejected': [(path, reason), ...]} 반환"""
+    # pandas/pyarrow 는 실제로 가져올 때만 로드 (--help 등은 빠르게)
+    import pandas as pd
+    from .store import open_store
+    from .summary import SummaryTable
+    store = open_store(db_dir, legacy_csv=legacy_csv)
+    if store.migration_error: log(f"경고: 기존 CSV DB 마이그레이션 실패 ({legacy_csv}): {store.migration_error}")
+    existing = set(store.roast_ids())
+    stored_hash = store.content_hashes()  # 이전 실행에서 가져온 파일 (--on-duplicate-id 와 상관없이 거부)
+    paths = list(find_logs(root))
+    seen_hash, seen_id = {}, {}
+    imported, rejected, pending = [], [], []
+    pending_hash = {}  # 다음 묶음의 Roast_ID -> 내용 해시 (매니페스트에 같이 기록)
+
+    def flush():
+        if pending:
+            store.append(pd.concat(pending, ignore_index=True), content_hashes=pending_hash)
+            pending.clear(); pending_hash.clear()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, digest, df, reason in pool.map(_parse_one, paths, chunksize=16):
+            if df is None:
+                rejected.append((path, reason)); continue
+            if digest in stored_hash:
+                rejected.append((path, "내용 중복 (DB 에 이미 가져온 파일)")); continue
+            if digest in seen_hash:
+                rejected.append((path, f"내용 중복 ({seen_hash[digest]})")); continue
+            seen_hash[digest] = path
+            rid = df["Roast_ID"].iloc[0]
+            if on_duplicate_id == "skip":
+                if rid in existing:
+                    rejected.append((path, f"Roast_ID 중복 (DB 에 이미 있음: {rid})")); continue
+                if rid in seen_id:
+                    rejected.append((path, f"Roast_ID 중복 ({seen_id[rid]})")); continue
+            seen_id[rid] = path
+            if rid in pending_hash: flush()  # (append) 같은 Roast_ID 의 다른 파일 -> 해시를 따로 남기도록 묶음을 나눔
+            pending.append(df); pending_hash[rid] = digest
+            imported.append((path, rid))
+            if len(pending) >= WRITE_BATCH: flush()
+    flush()
+    if update_summary and imported: SummaryTable(store).table()
+    log(f"가져옴 {len(imported)} / 거부 {len(rejected)} / 전체 {len(paths)}")
+    return {"imported": imported, "rejected": rejected}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m roast_core.batch_import", description="로스팅 로그 CSV 일괄 가져오기")
+    ap.add_argument("root", help="로그 CSV 가 들어있는 폴더 (하위 폴더 포함)")
+    ap.add_argument("--db", default=DEFAULT_DB_DIR, help="저장소 폴더")
+    ap.add_argument("--legacy-csv", default=DEFAULT_LEGACY_CSV, help="저장소가 없을 때 먼저 옮길 기존 CSV DB")
+    ap.add_argument("--workers", type=int, default=None, help="파싱 프로세스 수 (기본: CPU 수)")
+    ap.add_argument("--on-duplicate-id", choices=["skip", "append"], default="skip",
+                    help="이미 있는 Roast_ID 처리 (skip: 거부, append: 기존 로스팅에 이어붙임)")
+    ap.add_argument("--no-summary", action="store_true", help="요약표 갱신 생략")
+    ap.add_argument("--report", help="거부된 파일 목록을 저장할 CSV 경로")
+    args = ap.parse_args(argv)
+
+    res = run_import(args.root, db_dir=args.db, legacy_csv=args.legacy_csv, workers=args.workers,
+                     on_duplicate_id=args.on_duplicate_id, update_summary=not args.no_summary)
+    for path, reason in res["rejected"]:
+        print(f"  거부: {path} - {reason}", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w", newline="", encoding="utf-8-sig") as f:
+            w = csv.writer(f); w.writerow(["File", "Reason"]); w.writerows(res["rejected"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""이벤트 문자열 판별 (1차/2차 크랙, 배출 등)
+
+check_is_crack / event_kind 는 문자열 1개용(pandas 없이 동작), classify_events / with_event_columns 는
+Event 열 전체를 한 번에 분류해서 is_1c / is_2c / is_drop / Event_Kind 열로 붙임.
+"""
+import re
+
+EVENT_KINDS = ["charge", "tp", "yellow", "1c", "1c_end", "2c", "drop", "other"]
+EVENT_COLUMNS = ["Event_Kind", "is_1c", "is_2c", "is_drop"]
+
+# 정규식 패턴 (소문자로 바꾼 이벤트 문자열 기준)
+_PATTERNS = {
+    "charge": "charge|투입",
+    "tp": r"\btp\b|turning",
+    "yellow": "yellow|옐로",
+    "1c_any": "1c|1st|first|pop|1차|팝",
+    "2c": "2c|2nd|second|2차",
+    "end": "end|끝|종료",
+    "drop": "drop|배출",
+}
+
+
+def check_is_crack(event_str):
+    """문자열 1개 -> (is_1c, is_2c). event_kind / classify_events 와 같은 규칙 (끝/종료 도 1C 끝으로 봄)"""
+    return event_kind(event_str)[1:3]
+
+
+def event_kind(event_str):
+    """문자열 1개 -> (Event_Kind 또는 None, is_1c, is_2c, is_drop). classify_events 와 같은 규칙"""
+    raw = "" if event_str is None else str(event_str).strip()
+    e = raw.lower()
+    if not raw or e in ("nan", "none"): return None, False, False, False
+    has = {k: re.search(p, e) is not None for k, p in _PATTERNS.items()}
+    no2 = "2" not in e
+    is_1c = has["1c_any"] and not has["end"] and no2
+    is_1c_end = has["1c_any"] and has["end"] and no2
+    for kind, hit in (("drop", has["drop"]), ("2c", has["2c"]), ("1c", is_1c), ("1c_end", is_1c_end),
+                      ("yellow", has["yellow"]), ("tp", has["tp"]), ("charge", has["charge"])):
+        if hit: return kind, is_1c, has["2c"], has["drop"]
+    return "other", is_1c, has["2c"], has["drop"]
+
+
+def _unique_flags(events):
+    """서로 다른 이벤트 문자열만 판별 -> (행별 코드, {플래그: 고유값별 bool 배열}). 대부분의 행은 빈 문자열"""
+    import pandas as pd
+    codes, uniques = pd.factorize(pd.Series(events).fillna(""))
+    raw = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    e = raw.str.lower()
+    has = {k: e.str.contains(p).to_numpy() for k, p in _PATTERNS.items()}
+    no2 = ~e.str.contains("2", regex=False).to_numpy()
+    flags = {
+        "charge": has["charge"], "tp": has["tp"], "yellow": has["yellow"],
+        "1c": has["1c_any"] & ~has["end"] & no2,
+        "1c_end": has["1c_any"] & has["end"] & no2,
+        "2c": has["2c"], "drop": has["drop"],
+        "text": (raw != "").to_numpy() & ~e.isin(["nan", "none"]).to_numpy(),
+    }
+    return codes, flags
+
+
+def event_flags(events):
+    """Event 열 -> {"charge", "tp", "yellow", "1c", "1c_end", "2c", "drop": 행별 bool 배열}"""
+    codes, u = _unique_flags(events)
+    return {k: v[codes] for k, v in u.items() if k != "text"}
+
+
+def classify_events(events):
+    """Event 열 -> DataFrame(Event_Kind(categorical), is_1c, is_2c, is_drop). 이벤트가 없는 행의 Event_Kind 는 NaN"""
+    import numpy as np
+    import pandas as pd
+    codes, f = _unique_flags(events)
+    # 하나의 문자열이 여러 키워드를 가지면 배출 > 2C > 1C > 1C 끝 > 옐로잉 > TP > 투입 순
+    kinds = [EVENT_KINDS.index(k) for k in ("drop", "2c", "1c", "1c_end", "yellow", "tp", "charge", "other")]
+    kind = np.select([f["drop"], f["2c"], f["1c"], f["1c_end"], f["yellow"], f["tp"], f["charge"], f["text"]], kinds, default=-1)
+    return pd.DataFrame({
+        "Event_Kind": pd.Categorical.from_codes(kind[codes], categories=EVENT_KINDS),
+        "is_1c": f["1c"][codes], "is_2c": f["2c"][codes], "is_drop": f["drop"][codes],
+    }, index=getattr(events, "index", None))
+
+
+def with_event_columns(df):
+    """이벤트 분류 열이 없으면 붙인 새 DataFrame 반환 (이미 있으면 그대로)"""
+    if all(c in df.columns for c in EVENT_COLUMNS): return df
+    if "Event" not in df.columns: df = df.assign(Event="")
+    cls = classify_events(df["Event"])
+    return df.assign(**{c: cls[c] for c in EVENT_COLUMNS})
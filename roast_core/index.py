@@ -0,0 +1,39 @@
+"""Roast_ID 그룹 인덱스 - 한 번 정렬해 두고 로스팅별 구간을 바로 꺼내 씀"""
+import numpy as np
+import pandas as pd
+
+from .events import with_event_columns
+from .store import COLUMNS
+
+
+class RoastIndex:
+    """df 는 Roast_ID -> Time 순으로 정렬되고 이벤트 분류 열(is_1c, is_2c, is_drop, Event_Kind)이 붙음"""
+    def __init__(self, df=None):
+        if df is None or df.empty:
+            self.df = with_event_columns(pd.DataFrame(columns=COLUMNS))
+            self.ids = []
+            self._slices = {}
+            return
+        # 처음 등장한 순서를 유지하는 categorical Roast_ID
+        ids = pd.unique(df["Roast_ID"])
+        cat = pd.Categorical(df["Roast_ID"], categories=ids)
+        order = np.lexsort((df["Time"].to_numpy(), cat.codes))  # Roast_ID -> Time 순 (stable)
+        codes = cat.codes[order]
+        self.df = df.iloc[order].reset_index(drop=True)
+        self.df["Roast_ID"] = cat[order]
+        self.df = with_event_columns(self.df)  # 이벤트 분류는 인덱스를 만들 때 한 번만
+        bounds = np.searchsorted(codes, np.arange(len(ids) + 1))
+        self.ids = list(ids)
+        self._slices = {pid: (int(bounds[i]), int(bounds[i + 1])) for i, pid in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, roast_id):
+        return roast_id in self._slices
+
+    def get(self, roast_id):
+        """시간순 정렬된 로스팅 1개 (index 0 부터). 없으면 빈 DataFrame"""
+        if roast_id not in self._slices: return self.df.iloc[:0]
+        a, b = self._slices[roast_id]
+        return self.df.iloc[a:b].reset_index(drop=True)
@@ -0,0 +1,116 @@
+"""업로드 파일 파싱 결과 캐시 (파일 내용 해시 기준, LRU + 선택적 디스크 저장)"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def content_key(raw, file_name="", version=""):
+    """파일 내용 + 대체 이름(Roast_ID fallback) + 파서 버전으로 만든 키"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{version}\0{file_name}\0".encode("utf-8"))
+    h.update(raw)
+    return h.hexdigest()
+
+
+class IngestCache:
+    """max_bytes: 메모리 LRU 한도. disk_dir 를 주면 디스크에도 저장 (max_disk_bytes 를 넘으면 오래 안 쓴 파일부터 삭제).
+    version 이 None 이면 parsing.PARSER_VERSION (파서가 바뀌면 예전 결과는 자동으로 안 쓰임)"""
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, version=None, max_disk_bytes=512 * 1024 * 1024):
+        if version is None:
+            from .parsing import PARSER_VERSION
+            version = PARSER_VERSION
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.version = version
+        self._items = OrderedDict()  # key -> (df or None, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _get_mem(self, key):
+        with self._lock:
+            if key not in self._items: return _MISSING
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def _put_mem(self, key, df):
+        size = int(df.memory_usage(deep=True).sum()) if df is not None else 0
+        if size > self.max_bytes: return
+        with self._lock:
+            if key in self._items: self._size -= self._items.pop(key)[1]
+            self._items[key] = (df, size)
+            self._size += size
+            while self._size > self.max_bytes and self._items:
+                _, (_, s) = self._items.popitem(last=False)
+                self._size -= s
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.feather")
+
+    def _get_disk(self, key):
+        if not self.disk_dir: return _MISSING
+        import pandas as pd  # 디스크 캐시를 쓸 때만 필요
+        path = self._disk_path(key)
+        try: df = pd.read_feather(path)
+        except Exception: return _MISSING
+        try: os.utime(path)  # 최근 사용 표시 (삭제 순서 기준)
+        except OSError: pass
+        return df
+
+    def _put_disk(self, key, df):
+        if not self.disk_dir or df is None: return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp = self._disk_path(key) + f".{os.getpid()}.tmp"
+            df.reset_index(drop=True).to_feather(tmp)
+            os.replace(tmp, self._disk_path(key))
+        except Exception: return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """디스크 캐시가 max_disk_bytes 를 넘으면 수정 시각(= 마지막 사용)이 오래된 파일부터 삭제"""
+        if not self.max_disk_bytes: return
+        try:
+            files = []
+            for e in os.scandir(self.disk_dir):
+                if e.name.endswith(".feather"):
+                    st = e.stat(); files.append((st.st_mtime_ns, st.st_size, e.path))
+        except OSError: return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes: break
+            try: os.remove(path); total -= size
+            except OSError: pass  # 다른 프로세스가 먼저 지움
+
+    def get_or_load(self, raw, file_name, loader):
+        """캐시에 있으면 바로 반환, 없으면 loader(BytesIO, file_name) 로 파싱 후 저장.
+        반환된 DataFrame 은 캐시와 공유되므로 수정하지 말 것."""
+        key = content_key(raw, file_name, self.version)
+        df = self._get_mem(key)
+        if df is _MISSING:
+            df = self._get_disk(key)
+            if df is not _MISSING: self._put_mem(key, df)
+        if df is not _MISSING:
+            self.hits += 1
+            return df
+        self.misses += 1
+        df = loader(io.BytesIO(raw), file_name)
+        self._put_mem(key, df)
+        self._put_disk(key, df)
+        return df
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._items.clear(); self._size = 0
+        if disk and self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".feather"): os.remove(os.path.join(self.disk_dir, name))
@@ -0,0 +1,162 @@
+"""실시간 온도 스트리밍 - 센서 소스 + 백그라운드 샘플러 + 고정 크기 링버퍼
+
+소스는 read() -> (temp, gas) 또는 None 만 구현하면 됨 (gas 는 None 가능).
+"""
+import math
+import random
+import re
+import socket
+import threading
+import time
+
+import numpy as np
+
+_NUM = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def parse_reading(line):
+    """'201.5' / '201.5,3.0' / 'BT=201.5 GAS=3' 같은 한 줄 -> (temp, gas). 숫자가 없으면 None"""
+    nums = _NUM.findall(line if isinstance(line, str) else line.decode("utf-8", "ignore"))
+    if not nums: return None
+    return float(nums[0]), (float(nums[1]) if len(nums) > 1 else None)
+
+
+class RingBuffer:
+    """미리 할당한 배열에 (Time, Temp, Gas) 를 계속 덮어씀. 스레드 안전"""
+    def __init__(self, capacity=20000):
+        self.capacity = capacity
+        self._data = np.full((3, capacity), np.nan)
+        self._n = 0  # 지금까지 들어온 총 샘플 수
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._n, self.capacity)
+
+    def append(self, t, temp, gas=np.nan):
+        with self._lock:
+            self._data[:, self._n % self.capacity] = (t, temp, np.nan if gas is None else gas)
+            self._n += 1
+
+    def latest(self):
+        with self._lock:
+            if not self._n: return None
+            return tuple(self._data[:, (self._n - 1) % self.capacity])
+
+    def snapshot(self):
+        """시간순 복사본 (time, temp, gas)"""
+        with self._lock:
+            n, cap = self._n, self.capacity
+            if n <= cap: out = self._data[:, :n].copy()
+            else:
+                i = n % cap
+                out = np.concatenate([self._data[:, i:], self._data[:, :i]], axis=1)
+        return out[0], out[1], out[2]
+
+
+class SimulatorSource:
+    """가상의 로스팅 곡선 (테스트용): 투입 -> TP -> 점점 느려지는 상승"""
+    def __init__(self, charge=200.0, tp=90.0, tp_time=60.0, noise=0.3, speed=1.0):
+        self.charge, self.tp, self.tp_time, self.noise, self.speed = charge, tp, tp_time, noise, speed
+        self._t0 = time.time()
+
+    def read(self):
+        t = (time.time() - self._t0) * self.speed
+        if t < self.tp_time:
+            temp = self.tp + (self.charge - self.tp) * math.exp(-4 * t / self.tp_time)
+        else:
+            temp = self.tp + 120 * (1 - math.exp(-(t - self.tp_time) / 400))
+        return temp + random.gauss(0, self.noise), None
+
+    def close(self):
+        pass
+
+
+class ReplaySource:
+    """저장된 로스팅 (Time, Temp[, Gas]) 을 실제 시간(또는 배속)으로 재생"""
+    def __init__(self, df, speed=1.0):
+        d = df.sort_values("Time")
+        self.t = d["Time"].to_numpy(dtype=float)
+        self.temp = d["Temp"].to_numpy(dtype=float)
+        self.gas = d["Gas"].to_numpy(dtype=float) if "Gas" in d.columns else None
+        self.speed = speed
+        self._t0 = time.time()
+
+    def read(self):
+        t = self.t[0] + (time.time() - self._t0) * self.speed
+        if t > self.t[-1]: return None
+        gas = None
+        if self.gas is not None:
+            gas = float(self.gas[max(0, np.searchsorted(self.t, t, side="right") - 1)])
+        return float(np.interp(t, self.t, self.temp)), gas
+
+    def close(self):
+        pass
+
+
+class SerialSource:
+    """시리얼 열전대 리더 (한 줄에 온도[,가스]). pyserial 필요"""
+    def __init__(self, port, baudrate=9600, timeout=1.0):
+        import serial  # 선택 의존성
+        self._ser = serial.Serial(port, baudrate=baudrate, timeout=timeout)
+
+    def read(self):
+        line = self._ser.readline()
+        return parse_reading(line) if line else None
+
+    def close(self):
+        self._ser.close()
+
+
+class TcpSource:
+    """TCP 로 한 줄씩 보내는 온도계/게이트웨이 (예: 'host:port' 에 접속)"""
+    def __init__(self, host, port, timeout=2.0):
+        self._sock = socket.create_connection((host, int(port)), timeout=timeout)
+        self._file = self._sock.makefile("rb")
+
+    def read(self):
+        try: line = self._file.readline()
+        except socket.timeout: return None
+        return parse_reading(line) if line else None
+
+    def close(self):
+        try: self._file.close(); self._sock.close()
+        except OSError: pass
+
+
+class Sampler(threading.Thread):
+    """hz 주기로 source.read() 해서 start_time 기준 경과 시간과 함께 버퍼에 기록.
+    idle_timeout 초 동안 touch() 가 없으면 (탭을 닫았거나 세션이 끝난 경우) 스스로 멈추고 장치 연결을 닫음"""
+    def __init__(self, source, buffer, start_time, hz=1.0, idle_timeout=None):
+        super().__init__(daemon=True)
+        self.source, self.buffer, self.start_time = source, buffer, start_time
+        self.period = 1.0 / hz
+        self.idle_timeout = idle_timeout
+        self.gas = 0.0  # 소스가 가스 값을 주지 않으면 UI 에서 넣은 값을 사용
+        self.error = None
+        self._halt = threading.Event()
+        self._touched = time.monotonic()
+
+    def touch(self):
+        """화면이 아직 보고 있음 (rerun / 화면 갱신마다 호출)"""
+        self._touched = time.monotonic()
+
+    def run(self):
+        next_tick = time.time()
+        try:
+            while not self._halt.is_set():
+                if self.idle_timeout and time.monotonic() - self._touched > self.idle_timeout:
+                    self.error = TimeoutError(f"{self.idle_timeout:g}초 동안 화면 응답이 없어 기록을 멈췄습니다")
+                    break
+                r = self.source.read()
+                if r is not None:
+                    temp, gas = r
+                    self.buffer.append(time.time() - self.start_time, temp, self.gas if gas is None else gas)
+                next_tick += self.period
+                self._halt.wait(max(0.0, next_tick - time.time()))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.source.close()
+
+    def stop(self):
+        self._halt.set()
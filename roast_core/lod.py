@@ -0,0 +1,51 @@
+"""곡선 다운샘플링 (그래프 픽셀 폭에 맞춰 점 수 줄이기) - 여러 로스팅 겹쳐 그리기용"""
+import numpy as np
+
+
+def _clean(t, y):
+    t = np.asarray(t, dtype=float); y = np.asarray(y, dtype=float)
+    ok = ~(np.isnan(t) | np.isnan(y))
+    if not ok.all(): t, y = t[ok], y[ok]
+    if len(t) > 1 and (np.diff(t) < 0).any():
+        order = np.argsort(t, kind="stable"); t, y = t[order], y[order]
+    return t, y
+
+
+def minmax_downsample(t, y, n_bins):
+    """x 축을 n_bins 칸으로 나눠 칸마다 최저/최고 점만 남김 (봉우리/골짜기 보존, 최대 2*n_bins+2 점)"""
+    t, y = _clean(t, y)
+    n = len(t)
+    if n <= 2 * n_bins + 2 or t[-1] == t[0]: return t, y
+    b = np.minimum(((t - t[0]) * (n_bins / (t[-1] - t[0]))).astype(np.int64), n_bins - 1)
+    # 칸 번호 -> 값 순으로 정렬하면 칸마다 첫 번째가 최저, 마지막이 최고
+    order = np.lexsort((y, b))
+    bs = b[order]
+    first = np.flatnonzero(np.r_[True, bs[1:] != bs[:-1]])
+    last = np.r_[first[1:] - 1, n - 1]
+    keep = np.unique(np.concatenate(([0, n - 1], order[first], order[last])))
+    return t[keep], y[keep]
+
+
+def lttb(t, y, n_out):
+    """Largest-Triangle-Three-Buckets: 모양을 가장 잘 살리는 n_out 개 점 선택"""
+    t, y = _clean(t, y)
+    n = len(t)
+    if n_out >= n or n_out < 3: return t, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # 가운데 n_out-2 개 버킷 경계
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = t[nlo:nhi].mean(), y[nlo:nhi].mean()  # 다음 버킷 평균점
+        area = np.abs((t[a] - cx) * (y[lo:hi] - y[a]) - (t[a] - t[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return t[keep], y[keep]
+
+
+def downsample(t, y, n_px, method="minmax"):
+    """픽셀 폭 n_px 에 맞춘 다운샘플 (method: "minmax" | "lttb")"""
+    if method == "lttb": return lttb(t, y, 2 * n_px)
+    return minmax_downsample(t, y, n_px)
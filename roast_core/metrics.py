@@ -0,0 +1,51 @@
+"""DTR / 열량 / 시간 표시 등 가벼운 계산 (pandas 없이 동작)"""
+from datetime import datetime
+
+from .events import check_is_crack
+
+
+def get_intl_date_str():
+    now = datetime.now()
+    months = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    return f"{now.year}{months[now.month]}{now.day:02d}"
+
+
+def format_mmss(seconds):
+    m = int(seconds // 60); s = int(seconds % 60)
+    return f"{m}:{s:02d}"
+
+
+def get_dtr_feedback(dtr):
+    """DTR 수치에 따른 맛 평가 멘트"""
+    if dtr < 10: return "⚠️ 언더 디벨롭 (Under Developed): 풋내나 떫은 맛이 날 수 있어요. 시간을 조금 더 늘려보세요."
+    elif dtr <= 15: return "🍓 노르딕/라이트 (Light): 꽃향기와 화사한 산미, 차(Tea) 같은 깔끔함이 특징이에요."
+    elif dtr <= 20: return "⚖️ 미디엄/밸런스 (Medium): 단맛과 산미가 가장 조화로운 황금 비율이에요! (추천)"
+    elif dtr <= 25: return "🍫 미디엄 다크 (Medium Dark): 산미는 줄고 바디감과 초콜릿 향이 살아나요."
+    else: return "🔥 다크 (Dark): 묵직한 바디감, 스모키함, 쌉쌀한 맛이 강조돼요."
+
+
+def compute_dtr(points):
+    """[{'Time', 'Event'}, ...] -> (1C 시간, 총 시간, DTR%). 1C 가 없거나 1C 이후 기록이 없으면 DTR 은 None"""
+    pts = sorted((p for p in points if p.get("Time") is not None and p["Time"] == p["Time"]), key=lambda p: p["Time"])
+    if not pts: return None, None, None
+    total = pts[-1]["Time"]
+    t_1c = next((p["Time"] for p in pts if check_is_crack(str(p.get("Event")))[0]), None)
+    if t_1c and total > t_1c: return t_1c, total, (total - t_1c) / total * 100
+    return t_1c, total, None
+
+
+def compute_dtr_frame(df):
+    """시간순 DataFrame(is_1c 열 포함) -> compute_dtr 과 같은 (1C 시간, 총 시간, DTR%)"""
+    if df is None or len(df) == 0: return None, None, None
+    t = df["Time"].to_numpy(dtype=float)
+    total = t[-1]
+    hit = df["is_1c"].to_numpy().nonzero()[0]
+    t_1c = t[hit[0]] if len(hit) else None
+    if t_1c and total > t_1c: return t_1c, total, (total - t_1c) / total * 100
+    return t_1c, total, None
+
+
+def roast_energy_kj(green_weight, roasted_weight, last_temp, ambient=25):
+    """수분 증발열(2260 J/g) + 원두 현열(1.6 J/g℃) 로 본 흡수 열량 (kJ)"""
+    lw = green_weight - roasted_weight
+    return (lw * 2260 + roasted_weight * 1.6 * (last_temp - ambient)) / 1000
@@ -0,0 +1,143 @@
+"""로스팅 로그 CSV 파싱 (헤더 자동 탐지 + 컬럼 표준화)"""
+import codecs
+import csv
+import io
+import re
+
+import pandas as pd
+
+
+class RoastParseError(ValueError):
+    """파싱할 수 없는 파일 (메시지 = 거부 사유)"""
+
+
+PARSER_VERSION = "2"  # 파싱 결과가 바뀌는 수정을 하면 올림 (IngestCache 키에 포함 -> 예전 캐시 무효화)
+SNIFF_BYTES = 64 * 1024  # 빠른 경로에서 헤더/인코딩/구분자를 찾을 때 보는 앞부분 크기
+_DELIMITERS = [",", "\t", ";"]
+
+
+def _sniff(lines):
+    """(헤더 행 번호, 구분자, 메타데이터의 원두 이름) - 헤더가 없으면 행 번호 None.
+    Time/Temp 가 서로 다른 칸에 있어야 헤더로 인정 (탭/세미콜론 파일을 "," 한 칸으로 잘못 보던 문제)"""
+    extracted_id = None
+    for i, line in enumerate(lines):
+        if not line.strip(): continue
+        if ("원두" in line) or ("bean" in line.lower()):
+            parts = [p.strip() for p in re.split(r"[,\t;]", line)]
+            if len(parts) > 1 and parts[1]: extracted_id = parts[1]
+        for d in _DELIMITERS:
+            cells = [c.strip().lower() for c in line.split(d)]
+            if len(cells) > 1 and any(("time" in c) or ("시간" in c) for c in cells) and any(("temp" in c) or ("온도" in c) for c in cells):
+                return i, d, extracted_id
+    return None, ",", extracted_id
+
+
+def _column_map(columns):
+    col_map = {}
+    for col in columns:
+        c = str(col).strip().lower()
+        if ("time" in c) or ("시간" in c): col_map[col] = "Time"
+        elif ("temp" in c) or ("온도" in c): col_map[col] = "Temp"
+        elif ("gas" in c) or ("가스" in c): col_map[col] = "Gas"
+        elif ("event" in c) or ("이벤트" in c): col_map[col] = "Event"
+    return col_map
+
+
+def _parse_fast(raw, file_name_fallback):
+    """앞부분(SNIFF_BYTES)만 디코딩해서 인코딩/구분자/헤더/원두 이름을 찾고, 헤더부터는 Arrow CSV 리더로
+    바이트를 복사 없이 바로 타입 지정해서 읽음. 조금이라도 이상하면 예외 -> 호출한 쪽에서 관대한 경로로"""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    view = memoryview(raw)
+    bom = 3 if bytes(view[:3]) == codecs.BOM_UTF8 else 0
+    prefix = bytes(view[bom:bom + SNIFF_BYTES])
+    try: encoding, text = "utf-8", codecs.getincrementaldecoder("utf-8")().decode(prefix, final=len(raw) <= bom + SNIFF_BYTES)
+    except UnicodeDecodeError: encoding, text = "cp949", codecs.getincrementaldecoder("cp949")().decode(prefix, final=len(raw) <= bom + SNIFF_BYTES)
+    lines = text.splitlines(keepends=True)
+    idx, delimiter, extracted_id = _sniff(lines)
+    # 헤더 행이 앞부분 안에서 끝나야 함 (잘린 마지막 줄은 믿지 않음)
+    if idx is None or not lines[idx].endswith(("\n", "\r")): raise RoastParseError("앞부분에서 헤더를 찾지 못함")
+    offset = bom + len("".join(lines[:idx]).encode(encoding))
+    header = next(csv.reader([lines[idx]], delimiter=delimiter))
+    col_map = {c: std for c, std in _column_map(header).items() if c}
+    if sorted(col_map.values()) != sorted(set(col_map.values())): raise RoastParseError("중복 컬럼")
+    if ("Time" not in col_map.values()) or ("Temp" not in col_map.values()): raise RoastParseError("Time/Temp 컬럼 없음")
+    types = {c: (pa.string() if std == "Event" else pa.float64()) for c, std in col_map.items()}
+    table = pacsv.read_csv(
+        pa.BufferReader(view[offset:]),
+        read_options=pacsv.ReadOptions(encoding="utf8" if encoding == "utf-8" else encoding),
+        parse_options=pacsv.ParseOptions(delimiter=delimiter),
+        convert_options=pacsv.ConvertOptions(column_types=types, include_columns=list(col_map),
+                                             null_values=[""], strings_can_be_null=True))
+    df = table.rename_columns([col_map[c] for c in table.column_names]).to_pandas()
+    out = pd.DataFrame({"Time": df["Time"], "Temp": df["Temp"]})
+    out["Gas"] = df["Gas"].fillna(0) if "Gas" in df.columns else 0
+    if "Event" in df.columns:
+        ev = df["Event"].fillna("").astype(str).str.strip()
+        out["Event"] = ev.mask(ev.str.lower() == "nan", "")
+    else: out["Event"] = ""
+    out = out.dropna(subset=["Time", "Temp"])
+    out["Roast_ID"] = extracted_id if extracted_id else file_name_fallback.replace(".csv", "")
+    return out
+
+
+def _parse_tolerant(raw, file_name_fallback):
+    """전체를 디코딩하고 줄 단위로 정리하는 관대한 경로 (열 개수가 들쭉날쭉하거나 숫자가 아닌 값이 섞인 파일용)"""
+    if isinstance(raw, str): content = raw
+    else:
+        try: content = raw.decode("utf-8-sig")
+        except UnicodeDecodeError: content = raw.decode("cp949", errors="ignore")
+    lines = content.splitlines()
+    header_row_idx, delimiter, extracted_id = _sniff(lines)
+    if header_row_idx is None: raise RoastParseError("Time/Temp 헤더 행을 찾을 수 없음")
+    data_text = "\n".join(lines[header_row_idx:])
+    try: rows = list(csv.reader(io.StringIO(data_text), delimiter=delimiter))
+    except csv.Error as e: raise RoastParseError(f"CSV 형식 오류: {e}")
+    if not rows: raise RoastParseError("데이터 없음")
+    header = [str(c).strip() for c in rows[0]]
+    while header and header[-1] == "": header.pop()
+    expected = len(header)
+    cleaned = []
+    for r in rows[1:]:
+        r = [str(c).strip() for c in r]
+        if not any(r): continue
+        if len(r) > expected: r = r[:expected]
+        elif len(r) < expected: r = r + [""] * (expected - len(r))
+        cleaned.append(r)
+    df = pd.DataFrame(cleaned, columns=header)
+    df.columns = [str(c).strip() for c in df.columns]
+    df.rename(columns=_column_map(df.columns), inplace=True)
+    if ("Time" not in df.columns) or ("Temp" not in df.columns): raise RoastParseError("Time/Temp 컬럼 없음")
+    out = pd.DataFrame()
+    out["Time"] = pd.to_numeric(df["Time"], errors="coerce")
+    out["Temp"] = pd.to_numeric(df["Temp"], errors="coerce")
+    out["Gas"] = pd.to_numeric(df["Gas"], errors="coerce").fillna(0) if "Gas" in df.columns else 0
+    if "Event" in df.columns:
+        out["Event"] = df["Event"].fillna("").astype(str)
+        out.loc[out["Event"].str.lower() == "nan", "Event"] = ""
+    else: out["Event"] = ""
+    out = out.dropna(subset=["Time", "Temp"])
+    out["Roast_ID"] = extracted_id if extracted_id else file_name_fallback.replace(".csv", "")
+    return out
+
+
+def parse_roast_csv(file, file_name_fallback):
+    """로거/템플릿 CSV -> Time/Temp/Gas/Event/Roast_ID DataFrame. 실패 시 RoastParseError
+    정상적인 파일은 빠른 경로(Arrow CSV), 그 외에는 기존의 관대한 경로로 읽음"""
+    file.seek(0)
+    raw = file.getbuffer() if hasattr(file, "getbuffer") else file.read()  # BytesIO 는 복사 없이
+    if not isinstance(raw, str):
+        try: return _parse_fast(raw, file_name_fallback)
+        except Exception: pass
+        raw = bytes(raw)
+    return _parse_tolerant(raw, file_name_fallback)
+
+
+def get_template_csv():
+    return """파일 이름,Sample_01\n날짜,2026-Jan-01\n원두 이름,Geisha\n결과무게,215\n비고,템플릿\n\nTime(sec),Temp(C),Gas,Event\n0,200,0.5,Charge\n60,90,5.0,TP\n300,150,4.0,Yellowing\n540,192,2.0,1C Start\n600,205,0,Drop"""
+
+
+def load_and_standardize_csv(file, file_name_fallback):
+    """parse_roast_csv 와 같지만 실패하면 None (업로드 화면용)"""
+    try: return parse_roast_csv(file, file_name_fallback)
+    except Exception: return None
@@ -0,0 +1,114 @@
+"""rerun 단계별 시간 측정 (+ JSON lines 로그, 선택적 cProfile)
+
+    perf = RerunTimer()
+    ... ; perf.lap("db_manifest", rows=n)    # 직전 lap 이후 걸린 시간을 이 이름으로 기록
+    with perf.timed("load_roasts") as info: ...; info["rows"] = len(df)   # 특정 구간만 따로 (lap 과 별개로 합산)
+    PerfLog(path).write(perf.record(mode=...))
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+
+def rss_mb():
+    """현재 프로세스 메모리(RSS, MB). 알 수 없으면 None"""
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil  # 선택 의존성 (Windows/macOS)
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except Exception:
+        return None
+
+
+class RerunTimer:
+    def __init__(self):
+        self.start = self._last = time.perf_counter()
+        self.stages = []  # [{"name", "ms", "rows", "rss_mb"}]
+        self._timed = {}
+
+    def lap(self, name, rows=None):
+        """직전 lap(또는 시작) 이후 시간을 name 단계로 기록"""
+        now = time.perf_counter()
+        self.stages.append({"name": name, "ms": round((now - self._last) * 1000, 2), "rows": rows, "rss_mb": _round(rss_mb())})
+        self._last = now
+
+    @contextmanager
+    def timed(self, name):
+        """with 블록 시간을 name 으로 합산 (여러 번 호출되면 누적). 행 수는 블록 안에서 info["rows"] 에 넣음"""
+        info = {"rows": None}
+        t0 = time.perf_counter()
+        try: yield info
+        finally:
+            ms, n = self._timed.get(name, (0.0, None))
+            if info["rows"] is not None: n = (n or 0) + info["rows"]
+            self._timed[name] = (ms + (time.perf_counter() - t0) * 1000, n)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def record(self, **extra):
+        """로그 한 줄 (dict): 시각, 전체 시간, 단계별 시간/행 수/메모리, 추가 정보"""
+        timed = [{"name": k, "ms": round(ms, 2), "rows": n} for k, (ms, n) in self._timed.items()]
+        return {"ts": datetime.now().isoformat(timespec="milliseconds"), "total_ms": round(self.total_ms(), 2),
+                "rss_mb": _round(rss_mb()), "stages": self.stages, "timed": timed, **extra}
+
+
+def _round(v):
+    return None if v is None else round(v, 1)
+
+
+class PerfLog:
+    """JSON lines 로그 (max_mb 마다 .1, .2 .. 로 돌려 씀). 같은 경로는 같은 logger 를 재사용"""
+    def __init__(self, path, max_mb=5, backups=3):
+        self.path = path
+        self.logger = logging.getLogger(f"roast_perf.{os.path.abspath(path)}")
+        if not self.logger.handlers:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=int(max_mb * 2 ** 20), backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+    def write(self, rec):
+        self.logger.info(json.dumps(rec, ensure_ascii=False, default=str))
+
+    def read(self, last=200):
+        """최근 last 줄을 dict 목록으로 (깨진 줄은 건너뜀)"""
+        try:
+            with open(self.path, encoding="utf-8") as f: lines = f.readlines()[-last:]
+        except FileNotFoundError: return []
+        out = []
+        for line in lines:
+            try: out.append(json.loads(line))
+            except ValueError: pass
+        return out
+
+
+def start_profile():
+    """현재 스레드(= 이 rerun) 프로파일 시작. 다른 프로파일러가 이미 켜져 있으면 None"""
+    prof = cProfile.Profile()
+    try: prof.enable()
+    except ValueError: return None
+    return prof
+
+
+def stop_profile(prof, dump_path=None, top=30):
+    """프로파일 종료 -> 누적 시간 상위 top 개 함수 텍스트. dump_path 를 주면 .prof 파일도 저장 (snakeviz 등으로 열기)"""
+    prof.disable()
+    if dump_path:
+        os.makedirs(os.path.dirname(dump_path) or ".", exist_ok=True)
+        prof.dump_stats(dump_path)
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(top)
+    return out.getvalue()
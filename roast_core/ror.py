@@ -0,0 +1,51 @@
+"""RoR (Rate of Rise) 계산 - NumPy 벡터 연산으로 한 번에 계산"""
+from collections import namedtuple
+
+import numpy as np
+
+ROR_GREEN = "#2ecc71"
+ROR_BLUE = "#3498db"  # RoR 5 미만 (정체)
+ROR_RED = "#e74c3c"   # 직전보다 2 이상 상승 (플릭)
+ROR_WINDOWS = [0, 15, 30, 60]  # 평활 구간(초), 0 = 샘플 간 원본
+
+RoR = namedtuple("RoR", ["x", "width", "ror", "color", "label_idx"])
+
+
+def compute_ror(time_s, temp, window=0, max_labels=40, label_min=3):
+    """Time(초)/Temp 배열 -> 막대 중심(x), 폭, RoR(℃/min), 구간 색, 숫자 표시할 인덱스.
+    window > 0 이면 window 초 전 온도(보간)와의 차이로 평활한 RoR 을 사용."""
+    t = np.asarray(time_s, dtype=float)
+    y = np.asarray(temp, dtype=float)
+    if len(t) < 2:
+        e = np.empty(0)
+        return RoR(e, e, e, np.empty(0, dtype=object), np.empty(0, dtype=int))
+    left, right = t[:-1], t[1:]
+    dt = right - left
+    if window:
+        t0 = np.maximum(right - window, t[0])
+        span = right - t0
+        ror = np.divide((y[1:] - np.interp(t0, t, y)) * 60.0, span, out=np.zeros_like(span), where=span > 0)
+        valid = (dt > 0) & (span > 0)
+    else:
+        ror = np.divide(np.diff(y) * 60.0, dt, out=np.zeros_like(dt), where=dt > 0)
+        valid = dt > 0
+    x = (left + right)[valid] / 2
+    width = dt[valid]
+    ror = ror[valid]
+
+    # 색 구분: 직전 RoR 은 유효한 이전 구간 값 (첫 구간은 0)
+    prev = np.concatenate(([0.0], ror[:-1]))
+    color = np.where(ror < 5, ROR_BLUE, np.where(ror > prev + 2, ROR_RED, ROR_GREEN)).astype(object)
+
+    # 숫자 표시는 데이터 길이에 맞춰 간격을 벌림 (최대 max_labels 개)
+    cand = np.flatnonzero(ror > label_min)
+    step = max(1, int(np.ceil(len(cand) / max_labels))) if max_labels else 1
+    return RoR(x, width, ror, color, cand[::step] if max_labels else cand[:0])
+
+
+def ror_bar_verts(r, base=0.0):
+    """막대 사각형 꼭짓점 (n, 4, 2) - PolyCollection 한 번으로 그리기 위함"""
+    x0 = r.x - r.width / 2; x1 = r.x + r.width / 2
+    b = np.full_like(r.x, base)
+    return np.stack([np.column_stack([x0, b]), np.column_stack([x0, r.ror]),
+                     np.column_stack([x1, r.ror]), np.column_stack([x1, b])], axis=1)
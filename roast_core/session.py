@@ -0,0 +1,152 @@
+"""진행 중인 로스팅 기록 버퍼 - 미리 할당한 NumPy 배열에 점을 쌓고, RoR/1C/DTR 은 추가할 때마다 O(1) 로 갱신
+
+st.session_state 에 dict 리스트를 두고 매 rerun 마다 DataFrame 으로 바꾸던 것을 대체.
+점은 항상 시간순으로 보관하고, frame() 은 내용이 바뀐 경우에만 배열을 복사하지 않는 뷰로 다시 만듦.
+"""
+import math
+
+import numpy as np
+
+from .events import EVENT_KINDS, event_kind
+
+_KIND_CODE = {k: i for i, k in enumerate(EVENT_KINDS)}
+_ROW_FIELDS = ("_t", "_temp", "_gas", "_event", "_kind", "_is_1c", "_is_2c", "_is_drop")
+
+
+class RoastSession:
+    __slots__ = ("roast_id", "version", "_n", "_t", "_temp", "_gas", "_event", "_kind", "_is_1c", "_is_2c", "_is_drop",
+                 "_ror", "_t_max", "_t_1c", "_t_2c", "_frame", "_frame_version")
+
+    def __init__(self, roast_id="", capacity=256):
+        self.roast_id = roast_id
+        self.version = 0  # 내용이 바뀔 때마다 증가 (에디터 key, 캐시 무효화용)
+        self._alloc(capacity)
+        self._frame, self._frame_version = None, None
+
+    def _alloc(self, capacity):
+        self._n = 0
+        self._t = np.empty(capacity); self._temp = np.empty(capacity); self._gas = np.empty(capacity)
+        self._event = np.empty(capacity, dtype=object)
+        self._kind = np.empty(capacity, dtype=np.int8)
+        self._is_1c = np.empty(capacity, dtype=bool); self._is_2c = np.empty(capacity, dtype=bool)
+        self._is_drop = np.empty(capacity, dtype=bool)
+        self._ror = np.empty(capacity)  # 시간순 직전 점 대비 RoR (℃/min), 첫 점/간격 0 은 NaN
+        self._t_max = -math.inf
+        self._t_1c = self._t_2c = None
+
+    def _grow(self):
+        # 용량을 두 배로 (새 배열에 복사하므로 이전에 만든 frame 뷰는 그대로 유효)
+        cap = max(16, len(self._t) * 2)
+        for name in _ROW_FIELDS + ("_ror",):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def __len__(self):
+        return self._n
+
+    def __bool__(self):
+        return self._n > 0
+
+    def _set_ror(self, i):
+        dt = self._t[i] - self._t[i - 1] if i else 0.0
+        self._ror[i] = (self._temp[i] - self._temp[i - 1]) * 60.0 / dt if dt > 0 else math.nan
+
+    def append(self, time_s, temp, gas=0.0, event=None):
+        """점 하나 추가 (항상 시간순 유지). 마지막 시간 이후면 RoR/1C/DTR 을 O(1) 로 갱신"""
+        t = float(time_s) if time_s is not None else math.nan
+        y = float(temp) if temp is not None else math.nan
+        event = None if event is None or (isinstance(event, float) and math.isnan(event)) or str(event).strip() == "" else event
+        kind, is_1c, is_2c, is_drop = event_kind(event)
+        row = (t, y, float(gas) if gas is not None and gas == gas else 0.0, event,
+               _KIND_CODE[kind] if kind else -1, is_1c, is_2c, is_drop)
+        if self._n == len(self._t): self._grow()
+        n = self._n
+        if t == t and n and not self._t[n - 1] <= t:
+            # 중간 시간이 뒤늦게 들어온 경우(수동 입력) 또는 끝에 시간 없는 행이 있는 경우:
+            # 새 배열에 끼워 넣음 - 이전 frame 뷰는 건드리지 않음
+            i = int(np.searchsorted(self._t[:n], t, side="right"))
+            for name, v in zip(_ROW_FIELDS, row):
+                old = getattr(self, name)
+                new = np.empty(len(old), dtype=old.dtype)
+                new[:i] = old[:i]; new[i] = v; new[i + 1:n + 1] = old[i:n]
+                setattr(self, name, new)
+            new = np.empty(len(self._ror)); new[:i] = self._ror[:i]; new[i + 2:n + 1] = self._ror[i + 1:n]
+            self._ror = new
+            self._n += 1
+            self._set_ror(i); self._set_ror(i + 1)
+        else:
+            # 시간이 없는(NaN) 행은 맨 뒤에 두고 RoR/DTR 계산에서는 빠짐
+            for name, v in zip(_ROW_FIELDS, row): getattr(self, name)[n] = v
+            self._n += 1
+            self._set_ror(n)
+        if t == t:
+            self._t_max = max(self._t_max, t)
+            if is_1c and (self._t_1c is None or t < self._t_1c): self._t_1c = t
+            if is_2c and (self._t_2c is None or t < self._t_2c): self._t_2c = t
+        self.version += 1
+
+    def extend(self, records):
+        """{"Time", "Temp", "Gas", "Event"} dict 목록 또는 DataFrame 추가"""
+        if hasattr(records, "to_dict"): records = records.to_dict("records")
+        for r in records:
+            self.append(r.get("Time"), r.get("Temp"), r.get("Gas", 0.0), r.get("Event"))
+
+    def replace(self, records):
+        """전체 내용을 바꿈 (에디터 수정, 센서 기록 병합 등)"""
+        self._alloc(max(16, len(records)))
+        self.extend(records)
+        self.version += 1
+
+    def clear(self):
+        self._alloc(len(self._t))
+        self.version += 1
+
+    def last(self):
+        """마지막으로 추가한 점 (Time, Temp, Gas, Event) 또는 None"""
+        if not self._n: return None
+        i = self._n - 1
+        return {"Time": self._t[i], "Temp": self._temp[i], "Gas": self._gas[i], "Event": self._event[i]}
+
+    def records(self):
+        """시간순 dict 목록 (데이터 에디터 표시용)"""
+        n = self._n
+        return [{"Time": t, "Temp": y, "Gas": g, "Event": e, "Roast_ID": self.roast_id}
+                for t, y, g, e in zip(self._t[:n].tolist(), self._temp[:n].tolist(), self._gas[:n].tolist(), self._event[:n])]
+
+    def apply_edits(self, edited_rows=None, added_rows=None, deleted_rows=None):
+        """st.data_editor 의 변경 내역 {edited_rows, added_rows, deleted_rows} 반영 (행 번호 = records() 순서)"""
+        recs = self.records()
+        for i, change in (edited_rows or {}).items(): recs[int(i)].update(change)
+        drop = {int(i) for i in (deleted_rows or [])}
+        recs = [r for i, r in enumerate(recs) if i not in drop] + list(added_rows or [])
+        self.replace(recs)
+
+    def dtr(self):
+        """(1C 시간, 총 시간, DTR%) - compute_dtr 과 같은 값을 저장된 상태로 바로 반환"""
+        if not self._n or self._t_max == -math.inf: return None, None, None
+        total, t_1c = self._t_max, self._t_1c
+        if t_1c and total > t_1c: return t_1c, total, (total - t_1c) / total * 100
+        return t_1c, total, None
+
+    def last_ror(self):
+        """마지막 두 점 사이 RoR (℃/min)"""
+        if self._n < 2: return None
+        v = self._ror[self._n - 1]
+        return None if math.isnan(v) else float(v)
+
+    def frame(self):
+        """시간순 DataFrame (Time, Temp, Gas, Event, Roast_ID + 이벤트 분류 열). 내용이 바뀐 경우에만 다시 만듦.
+        복사 없이 내부 배열을 공유하므로 수정하지 말 것"""
+        key = (self.version, self.roast_id)
+        if self._frame_version == key: return self._frame
+        import pandas as pd
+        n = self._n
+        cols = {"Time": self._t[:n], "Temp": self._temp[:n], "Gas": self._gas[:n], "Event": self._event[:n]}
+        df = pd.DataFrame(cols, copy=False)
+        df["Roast_ID"] = self.roast_id
+        df["Event_Kind"] = pd.Categorical.from_codes(self._kind[:n], categories=EVENT_KINDS)
+        df["is_1c"] = self._is_1c[:n]; df["is_2c"] = self._is_2c[:n]; df["is_drop"] = self._is_drop[:n]
+        self._frame, self._frame_version = df, key
+        return df
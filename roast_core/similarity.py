@@ -0,0 +1,176 @@
+"""비슷한 로스팅 찾기 - 온도 곡선을 고정 시간축에 리샘플한 행렬 + 벡터 거리 계산
+
+행렬은 DB 폴더에 similarity_<align>.npz 로 저장하고, 매니페스트와 행 수가 다른 로스팅만 다시 계산함.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .index import RoastIndex
+
+GRID = np.arange(0.0, 1201.0, 10.0)  # 0~20분, 10초 간격
+ALIGNS = [None, "charge", "tp"]
+MIN_OVERLAP = 0.5  # 쿼리 구간 중 이 비율 이상 겹쳐야 후보로 인정
+
+
+def _offsets(d, key, starts, align):
+    """로스팅별 기준 시각 (charge: Charge 이벤트 또는 첫 샘플, tp: TP 이벤트 또는 최저 온도)"""
+    t = d["Time"].to_numpy(dtype=float)
+    n = len(starts)
+    if align is None: return np.zeros(n)
+    kind = d["Event_Kind"]
+    if align == "charge":
+        ev = pd.Series(np.where(kind == "charge", t, np.nan)).groupby(key).first().reindex(range(n)).to_numpy()
+        return np.where(np.isnan(ev), t[starts], ev)
+    ev = pd.Series(np.where(kind == "tp", t, np.nan)).groupby(key).first().reindex(range(n)).to_numpy()
+    imin = d["Temp"].reset_index(drop=True).groupby(key).idxmin().reindex(range(n)).to_numpy()
+    return np.where(np.isnan(ev), t[imin], ev)
+
+
+def resample_curve(time_s, temp, grid=GRID, offset=0.0):
+    """곡선 하나를 grid 로 보간. 기록 범위 밖은 NaN"""
+    t = np.asarray(time_s, dtype=float) - offset
+    y = np.asarray(temp, dtype=float)
+    out = np.full(len(grid), np.nan, dtype=np.float32)
+    if len(t) < 2: return out
+    order = np.argsort(t, kind="stable"); t, y = t[order], y[order]
+    inside = (grid >= t[0]) & (grid <= t[-1])
+    out[inside] = np.interp(grid[inside], t, y)
+    return out
+
+
+def resample_many(df, grid=GRID, align=None):
+    """(Time, Temp, Event, Roast_ID) 프레임 -> (ids, 행 수, 곡선 행렬 (n, len(grid)))"""
+    if df is None or df.empty: return [], np.empty(0, dtype=np.int64), np.empty((0, len(grid)), dtype=np.float32)
+    idx = RoastIndex(df)
+    d = idx.df
+    key = d["Roast_ID"].cat.codes.to_numpy()
+    n = len(idx.ids)
+    starts = np.searchsorted(key, np.arange(n + 1))
+    offs = _offsets(d, key, starts[:-1], align)
+    t = d["Time"].to_numpy(dtype=float); y = d["Temp"].to_numpy(dtype=float)
+    mat = np.empty((n, len(grid)), dtype=np.float32)
+    for i in range(n):
+        a, b = starts[i], starts[i + 1]
+        mat[i] = resample_curve(t[a:b], y[a:b], grid, offs[i])
+    return idx.ids, np.diff(starts), mat
+
+
+def curve_ror(mat, grid=GRID):
+    """리샘플된 온도 행렬 -> RoR(℃/min) 행렬"""
+    r = np.full_like(mat, np.nan)
+    r[:, 1:] = np.diff(mat, axis=1) * (60.0 / np.diff(grid)).astype(np.float32)
+    return r
+
+
+class SimilarityIndex:
+    def __init__(self, store, align=None, grid=GRID):
+        self.store, self.align, self.grid = store, align, grid
+        self.path = os.path.join(store.root, f"similarity_{align or 'raw'}.npz")
+        self.ids, self.rows = [], np.empty(0, dtype=np.int64)
+        self.temp = np.empty((0, len(grid)), dtype=np.float32)
+        self._pos = {}
+        self._synced = None
+        self._loaded = False
+        self._prepare()
+
+    def _load_file(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as z:
+                if len(z["grid"]) != len(self.grid) or not np.allclose(z["grid"], self.grid): return
+                self.ids, self.rows, self.temp = list(z["ids"]), z["rows"], z["temp"]
+        except (OSError, KeyError, ValueError): pass
+
+    def _save(self):
+        os.makedirs(self.store.root, exist_ok=True)
+        tmp = self.path + f".{os.getpid()}.tmp.npz"
+        np.savez(tmp, ids=np.array(self.ids, dtype=str), rows=self.rows, temp=self.temp, grid=self.grid)
+        os.replace(tmp, self.path)
+
+    def _prepare(self):
+        # 거리 계산용: NaN -> 0 으로 채운 값 + 유효 마스크
+        self._pos = {rid: i for i, rid in enumerate(self.ids)}
+        valid = ~np.isnan(self.temp)
+        self._valid = valid.astype(np.float32)
+        self._filled = np.where(valid, self.temp, 0).astype(np.float32)
+        ror = curve_ror(self.temp, self.grid)
+        rv = ~np.isnan(ror)
+        self._ror_valid = rv.astype(np.float32)
+        self._ror_filled = np.where(rv, ror, 0).astype(np.float32)
+
+    def sync(self):
+        """매니페스트 기준으로 새로 추가되었거나 이어붙여진 로스팅만 다시 리샘플"""
+        if not self._loaded:
+            self._load_file(); self._loaded = True; self._prepare()
+        version = self.store.version
+        if version == self._synced: return self
+        m = self.store.manifest
+        if not m.empty:
+            rows = m.groupby("Roast_ID", sort=False)["Rows"].sum()
+            have = pd.Series(self.rows, index=self.ids, dtype="float64") if self.ids else pd.Series(dtype="float64")
+            stale = list(rows.index[(have.reindex(rows.index) != rows).to_numpy()])
+            if stale: self.update(stale)
+        self._synced = version
+        return self
+
+    def update(self, roast_ids, chunk=2000):
+        """지정한 로스팅만 다시 계산해서 행렬에 반영 (새 로스팅은 끝에 추가)"""
+        ids, rows, temp = list(self.ids), self.rows.copy(), self.temp
+        new_rows, new_temp, new_ids = [], [], []
+        for i in range(0, len(roast_ids), chunk):
+            got_ids, got_rows, got_mat = resample_many(self.store.read(roast_ids[i:i + chunk]), self.grid, self.align)
+            for rid, r, curve in zip(got_ids, got_rows, got_mat):
+                if rid in self._pos:
+                    j = self._pos[rid]; rows[j] = r; temp[j] = curve
+                else:
+                    new_ids.append(rid); new_rows.append(r); new_temp.append(curve)
+        if new_ids:
+            ids += new_ids
+            rows = np.concatenate([rows, np.asarray(new_rows, dtype=np.int64)])
+            temp = np.vstack([temp, np.asarray(new_temp, dtype=np.float32)])
+        self.ids, self.rows, self.temp = ids, rows, temp
+        self._prepare()
+        self._save()
+        return self
+
+    def query_curve(self, curve, k=10, use_ror=False, ror_weight=1.0, exclude=()):
+        """리샘플된 곡선 하나와 가장 가까운 k 개 -> DataFrame(Roast_ID, Distance, Overlap)"""
+        cols = np.flatnonzero(~np.isnan(curve))
+        if not len(self.ids) or not len(cols): return pd.DataFrame(columns=["Roast_ID", "Distance", "Overlap"])
+        # 쿼리 구간은 보통 연속이므로 슬라이스(view)로 계산, 중간 NaN 은 마스크로 처리
+        a, b = cols[0], cols[-1] + 1
+        q = np.nan_to_num(curve[a:b]).astype(np.float32)
+        qv = ~np.isnan(curve[a:b])
+        v = self._valid[:, a:b] if qv.all() else self._valid[:, a:b] * qv
+        diff = self._filled[:, a:b] - q
+        cnt = v.sum(axis=1)
+        sq = np.einsum("ij,ij,ij->i", diff, diff, v)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dist = np.sqrt(sq / cnt)
+            if use_ror:
+                qr = curve_ror(curve[None, :], self.grid)[0]
+                rcols = np.flatnonzero(~np.isnan(qr))
+                if len(rcols):
+                    ra, rb = rcols[0], rcols[-1] + 1
+                    qrv = ~np.isnan(qr[ra:rb])
+                    rv = self._ror_valid[:, ra:rb] if qrv.all() else self._ror_valid[:, ra:rb] * qrv
+                    rd = self._ror_filled[:, ra:rb] - np.nan_to_num(qr[ra:rb]).astype(np.float32)
+                    dist = dist + ror_weight * np.sqrt(np.einsum("ij,ij,ij->i", rd, rd, rv) / rv.sum(axis=1))
+        overlap = cnt / len(cols)
+        dist = np.where(overlap >= MIN_OVERLAP, dist, np.inf)
+        for rid in exclude:
+            if rid in self._pos: dist[self._pos[rid]] = np.inf
+        k = min(k, len(dist))
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        top = top[np.isfinite(dist[top])]
+        return pd.DataFrame({"Roast_ID": [self.ids[i] for i in top], "Distance": dist[top], "Overlap": overlap[top]})
+
+    def query(self, df, k=10, use_ror=False, ror_weight=1.0, exclude=()):
+        """진행 중인 로스팅(또는 저장된 로스팅 하나)의 Time/Temp(/Event) 로 검색"""
+        d = df.assign(Roast_ID="__query__") if "Roast_ID" not in df.columns or df["Roast_ID"].nunique() != 1 else df
+        if "Event" not in d.columns: d = d.assign(Event="")
+        _, _, mat = resample_many(d[["Time", "Temp", "Event", "Roast_ID"]].dropna(subset=["Time", "Temp"]), self.grid, self.align)
+        if not len(mat): return pd.DataFrame(columns=["Roast_ID", "Distance", "Overlap"])
+        return self.query_curve(mat[0], k=k, use_ror=use_ror, ror_weight=ror_weight, exclude=exclude)
@@ -0,0 +1,59 @@
+"""시작 시간 측정 - 각 항목을 새 프로세스로 실행해서 중앙값을 목표치와 비교
+
+    python -m roast_core.startup_check [--repeat 5]
+
+목표치를 넘는 항목이 있으면 종료 코드 1.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "Roasting_App.py")
+
+# 빈 DB 로 앱 스크립트를 한 번 끝까지 실행 (Streamlit import + 첫 화면 렌더링)
+_APP_SNIPPET = (
+    "from streamlit.testing.v1 import AppTest\n"
+    f"at = AppTest.from_file({APP_PATH!r}, default_timeout=120).run()\n"
+    "assert not at.exception, at.exception\n"
+)
+
+# (이름, 명령, 목표 초)
+TARGETS = [
+    ("core import", [sys.executable, "-c", "import roast_core"], 0.15),
+    ("core metrics (no pandas)", [sys.executable, "-c", "from roast_core import compute_dtr, check_is_crack"], 0.15),
+    ("CLI --help", [sys.executable, "-m", "roast_core.batch_import", "--help"], 0.3),
+    ("app first run", [sys.executable, "-c", _APP_SNIPPET], 6.0),
+]
+
+
+def measure(cmd, repeat=5, cwd=None):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m roast_core.startup_check", description="시작 시간 측정")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+    failed = False
+    with tempfile.TemporaryDirectory() as cwd:
+        for name, cmd, target in TARGETS:
+            sec = measure(cmd, args.repeat, cwd=cwd)
+            ok = sec <= target
+            failed |= not ok
+            print(f"{'OK ' if ok else 'SLOW'} {name:<26} {sec * 1000:8.0f} ms  (목표 {target * 1000:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
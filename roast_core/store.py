@@ -0,0 +1,419 @@
+"""로스팅 기록 저장소 (Arrow IPC 세그먼트 + 매니페스트 + 저널)
+
+- segments/*.arrow      : 로스팅 1개 = RecordBatch 1개 (memory-map 으로 필요한 배치만 읽음).
+                          저장할 때마다 작은 파일이 하나씩 생기고, 체크포인트 때 작은 파일끼리 합침
+- manifest.feather      : Roast_ID -> (Segment, Batch) 위치와 간단한 메타데이터 (체크포인트)
+- journal-<gen>.jsonl   : 마지막 체크포인트 이후 추가된 매니페스트 행 (write-ahead journal)
+
+쓰기는 .lock 파일 잠금으로 프로세스/스레드 간 직렬화하고, 세그먼트 -> 저널 순서로 fsync 해서
+저장 도중 죽어도 반쯤 쓴 저널 끝부분만 잘라내면 일관된 상태로 돌아옴.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+COLUMNS = ["Time", "Temp", "Gas", "Event", "Roast_ID"]
+SCHEMA = pa.schema([("Time", pa.float64()), ("Temp", pa.float64()), ("Gas", pa.float64()),
+                    ("Event", pa.string()), ("Roast_ID", pa.string())])
+# Content_Hash: 일괄 가져오기한 원본 파일의 내용 해시 (앱에서 저장한 기록은 비어 있음, 예전 매니페스트에는 열 자체가 없음)
+MANIFEST_COLUMNS = ["Roast_ID", "Segment", "Batch", "Rows", "Duration", "Max_Temp", "Saved_At", "Content_Hash"]
+SEGMENT_ROASTS = 1000  # 세그먼트 파일 하나에 담는 최대 로스팅 수
+CHECKPOINT_EVERY = 256  # 저널 행이 이만큼 쌓이면 manifest.feather 로 합침
+COMPACT_BELOW = 32  # 로스팅 수가 이보다 적은 세그먼트는 체크포인트 때 하나로 합침
+LEGACY_KEY = b"legacy_migrated"  # 매니페스트 메타데이터: 기존 CSV DB 마이그레이션 완료 표시
+READER_CACHE = 64  # 열어 두는 세그먼트 파일 최대 개수 (오래 안 쓴 것부터 닫음 - 파일 핸들 한도)
+
+log = logging.getLogger(__name__)
+
+
+def _clean_str(s):
+    s = s.astype(object).where(s.notna(), "").astype(str).str.replace("\ufeff", "", regex=False).str.strip()
+    return s.mask(s.isin(["nan", "None"]), "")
+
+
+def normalize_frame(df):
+    """Time/Temp/Gas/Event/Roast_ID 표준 스키마로 정리 (숫자 변환 실패 행은 제거)"""
+    out = pd.DataFrame(index=df.index)
+    out["Time"] = pd.to_numeric(_clean_str(df["Time"]), errors="coerce")
+    out["Temp"] = pd.to_numeric(_clean_str(df["Temp"]), errors="coerce")
+    out["Gas"] = pd.to_numeric(_clean_str(df["Gas"]), errors="coerce").fillna(0.0) if "Gas" in df.columns else 0.0
+    out["Event"] = _clean_str(df["Event"]) if "Event" in df.columns else ""
+    out["Roast_ID"] = _clean_str(df["Roast_ID"])
+    out = out.dropna(subset=["Time", "Temp"])
+    return out[out["Roast_ID"] != ""].reset_index(drop=True)
+
+
+def _fsync_write(path, data, mode="wb"):
+    with open(path, mode) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class StoreLock:
+    """DB 폴더 단위 쓰기 잠금 (같은 프로세스의 스레드 + 다른 프로세스 모두). 재진입 가능"""
+    def __init__(self, path):
+        self.path = path
+        self._tlock = threading.RLock()
+        self._fh = None
+        self._depth = 0
+
+    def __enter__(self):
+        self._tlock.acquire()
+        if self._depth == 0:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fh = open(self.path, "a+b")
+            if os.name == "nt":
+                import msvcrt
+                self._fh.seek(0)
+                while True:
+                    try: msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1); break
+                    except OSError: pass
+            else:
+                import fcntl
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    self._fh.seek(0); msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._fh.close(); self._fh = None
+        self._tlock.release()
+
+
+class RoastStore:
+    def __init__(self, root):
+        self.root = root
+        self.seg_dir = os.path.join(root, "segments")
+        self.manifest_path = os.path.join(root, "manifest.feather")
+        self.lock = StoreLock(os.path.join(root, ".lock"))
+        self._manifest = pd.DataFrame(columns=MANIFEST_COLUMNS)
+        self._base_stat = None  # manifest.feather (mtime, size)
+        self._gen = 0           # 체크포인트 세대 = 이어서 읽을 저널 번호
+        self._journal_pos = 0   # 저널에서 이미 반영한 바이트 위치
+        self._journal_rows = 0
+        self._ids = []
+        self._locs = {}  # Roast_ID -> 매니페스트 행 번호 배열
+        self._readers = OrderedDict()  # 세그먼트 -> (memory map, reader), 최근 사용 순
+        self._reader_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.migration_error = None  # open_store 의 CSV 마이그레이션 실패 (앱에서 표시, 그동안 새 저장소는 만들지 않음)
+        self._legacy = None  # 매니페스트의 LEGACY_KEY 값 (마이그레이션 완료 시각)
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def _journal_path(self, gen=None):
+        return os.path.join(self.root, f"journal-{self._gen if gen is None else gen}.jsonl")
+
+    def _set_manifest(self, m, start=0):
+        """매니페스트 교체 + Roast_ID 인덱스 갱신 (start 이후 행만 새로 붙은 경우 그 부분만 반영)"""
+        if start == 0:
+            codes, uniques = pd.factorize(m["Roast_ID"])
+            order = np.argsort(codes, kind="stable")
+            self._locs = dict(zip(uniques, np.split(order, np.cumsum(np.bincount(codes))[:-1]))) if len(m) else {}
+            self._ids = list(self._locs)
+        else:
+            locs, ids = dict(self._locs), list(self._ids)
+            for p, rid in enumerate(m["Roast_ID"].iloc[start:], start):
+                if rid not in locs: ids.append(rid)
+                locs[rid] = np.append(locs.get(rid, np.empty(0, dtype=np.intp)), p)
+            self._locs, self._ids = locs, ids
+        self._manifest = m
+
+    def _read_journal(self, pos):
+        """pos 이후의 완전한 줄(\\n 으로 끝난)만 읽음 -> (행 목록, 새 위치)"""
+        try:
+            with open(self._journal_path(), "rb") as f:
+                f.seek(pos); data = f.read()
+        except FileNotFoundError: return [], pos
+        end = data.rfind(b"\n") + 1
+        rows = []
+        for line in data[:end].splitlines():
+            try: rows.append(json.loads(line))
+            except ValueError: pass  # 복구 전의 깨진 줄은 건너뜀
+        return rows, pos + end
+
+    def _refresh(self):
+        """체크포인트가 바뀌었으면 다시 읽고, 아니면 저널에 새로 붙은 줄만 반영"""
+        with self._refresh_lock:
+            try: info = os.stat(self.manifest_path); base = (info.st_mtime_ns, info.st_size)
+            except FileNotFoundError: return
+            if base != self._base_stat:
+                table = feather.read_table(self.manifest_path)
+                meta = table.schema.metadata or {}
+                self._gen = int(meta.get(b"journal_gen", b"0"))
+                self._legacy = meta.get(LEGACY_KEY)
+                self._journal_pos = 0; self._journal_rows = 0
+                self._base_stat = base
+                m = table.to_pandas()
+                if list(m.columns) != MANIFEST_COLUMNS: m = m.reindex(columns=MANIFEST_COLUMNS)
+                self._set_manifest(m)
+            rows, pos = self._read_journal(self._journal_pos)
+            self._journal_pos = pos
+            if rows:
+                self._journal_rows += len(rows)
+                new = pd.DataFrame(rows, columns=MANIFEST_COLUMNS)
+                start = len(self._manifest)
+                self._set_manifest(new if self._manifest.empty else pd.concat([self._manifest, new], ignore_index=True), start)
+
+    @property
+    def manifest(self):
+        """매니페스트 (체크포인트 + 저널, 바뀐 부분만 다시 읽고 Roast_ID 인덱스도 갱신)"""
+        self._refresh()
+        return self._manifest
+
+    @property
+    def version(self):
+        """매니페스트 버전 - 파생 캐시(요약표, 유사도 인덱스) 무효화용"""
+        self._refresh()
+        return (self._base_stat, self._journal_pos)
+
+    def roast_ids(self):
+        """저장된 순서대로의 Roast_ID 목록 (매니페스트가 바뀔 때만 다시 계산)"""
+        self._refresh()
+        return self._ids
+
+    def content_hashes(self):
+        """이미 가져온 원본 파일 내용 해시 집합"""
+        return set(self.manifest["Content_Hash"].dropna())
+
+    def __contains__(self, roast_id):
+        self._refresh()
+        return roast_id in self._locs
+
+    def _reader(self, segment):
+        """(_reader_lock 안에서) 세그먼트 reader. 세그먼트는 한 번 쓰면 바뀌지 않으므로 재사용하되
+        최근 READER_CACHE 개만 열어 둠 (이미 읽은 배치는 메모리 맵 영역을 따로 잡고 있어서 닫아도 유효)"""
+        hit = self._readers.pop(segment, None)
+        if hit is None:
+            src = pa.memory_map(os.path.join(self.seg_dir, segment), "r")
+            hit = (src, pa.ipc.open_file(src))
+        self._readers[segment] = hit
+        while len(self._readers) > READER_CACHE: self._readers.popitem(last=False)[1][0].close()
+        return hit[1]
+
+    def _drop_reader(self, segment):
+        with self._reader_lock:
+            hit = self._readers.pop(segment, None)
+            if hit: hit[0].close()
+
+    def _batches(self, m):
+        # 다른 스레드가 reader 를 닫지 못하도록 배치를 가져오는 동안 잠금
+        with self._reader_lock:
+            return [self._reader(seg).get_batch(int(b)) for seg, b in zip(m["Segment"], m["Batch"])]
+
+    def read(self, roast_ids=None):
+        """선택한 로스팅만 읽기 (None 이면 전체)"""
+        for retry in (False, True):
+            m = self.manifest
+            if roast_ids is not None:
+                pos = [p for rid in roast_ids for p in self._locs.get(rid, ())]
+                m = m.iloc[sorted(pos)]
+            if m.empty: return pd.DataFrame({c: pd.Series(dtype="float64" if c in ("Time", "Temp", "Gas") else object) for c in COLUMNS})
+            try: batches = self._batches(m); break
+            except FileNotFoundError:
+                # 다른 프로세스가 체크포인트에서 세그먼트를 합치고 지운 직후 - 새 매니페스트로 한 번 더
+                if retry: raise
+        return pa.Table.from_batches(batches, schema=SCHEMA).to_pandas()
+
+    def _write_batches(self, batches):
+        """RecordBatch 목록 -> 새 세그먼트 파일 (임시 파일에 fsync 후 이름 변경). 파일 이름 반환"""
+        os.makedirs(self.seg_dir, exist_ok=True)
+        name = f"{time.time_ns():x}-{os.getpid()}-{threading.get_ident() % 65536:x}.arrow"
+        path = os.path.join(self.seg_dir, name)
+        codec = "zstd" if pa.Codec.is_available("zstd") else None
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, SCHEMA, options=pa.ipc.IpcWriteOptions(compression=codec)) as w:
+            for batch in batches: w.write_batch(batch)
+        _fsync_write(path + ".tmp", sink.getvalue().to_pybytes())
+        os.replace(path + ".tmp", path)
+        return name
+
+    def _write_segment(self, groups, content_hashes=None):
+        saved_at = datetime.now().isoformat(timespec="seconds")
+        hashes = content_hashes or {}
+        name = self._write_batches(pa.RecordBatch.from_pandas(g[COLUMNS], schema=SCHEMA, preserve_index=False) for _, g in groups)
+        return [{"Roast_ID": rid, "Segment": name, "Batch": b, "Rows": len(g),
+                 "Duration": float(g["Time"].max()), "Max_Temp": float(g["Temp"].max()), "Saved_At": saved_at,
+                 "Content_Hash": hashes.get(rid)}
+                for b, (rid, g) in enumerate(groups)]
+
+    def _compact(self, m):
+        """(잠금 안에서) 로스팅 수가 COMPACT_BELOW 미만인 세그먼트들을 SEGMENT_ROASTS 개 단위로 합침
+        -> (새 매니페스트, 더 이상 쓰지 않는 세그먼트 목록). 매니페스트 행 순서는 그대로"""
+        counts = m["Segment"].value_counts()
+        small = set(counts.index[counts < COMPACT_BELOW])
+        if len(small) < 2: return m, []
+        seg = m["Segment"].to_numpy(dtype=object).copy()
+        batch = m["Batch"].to_numpy(dtype=np.int64).copy()
+        pos = np.flatnonzero(m["Segment"].isin(small).to_numpy())
+        for start in range(0, len(pos), SEGMENT_ROASTS):
+            chunk = pos[start:start + SEGMENT_ROASTS]
+            name = self._write_batches(self._batches(m.iloc[chunk]))
+            seg[chunk] = name; batch[chunk] = np.arange(len(chunk))
+        return m.assign(Segment=seg, Batch=batch), sorted(small)
+
+    def _write_manifest(self, manifest, gen):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        table = pa.Table.from_pandas(manifest.reset_index(drop=True)[MANIFEST_COLUMNS], preserve_index=False)
+        meta = {**(table.schema.metadata or {}), b"journal_gen": str(gen).encode()}
+        if self._legacy is not None: meta[LEGACY_KEY] = self._legacy  # 체크포인트마다 그대로 이어감
+        table = table.replace_schema_metadata(meta)
+        feather.write_feather(table, tmp)
+        with open(tmp, "rb") as f: os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+
+    def _repair_journal(self):
+        """(잠금 안에서) 쓰다 죽은 저널 끝부분(\\n 없는 마지막 줄) 잘라내기"""
+        path = self._journal_path()
+        try: size = os.path.getsize(path)
+        except FileNotFoundError: return 0
+        with open(path, "r+b") as f:
+            data = f.read()
+            good = data.rfind(b"\n") + 1
+            if good == size: return 0
+            f.truncate(good); f.flush(); os.fsync(f.fileno())
+        return size - good
+
+    def recover(self):
+        """시작 시 복구: 반쯤 쓴 저널 끝부분, 남은 임시 세그먼트(.tmp), 매니페스트에 없는 세그먼트
+        (저널 기록 전에 죽었거나, 합친 뒤 지우지 못한 파일) 정리"""
+        if not self.exists(): return
+        with self.lock:
+            self._refresh()
+            self._repair_journal()
+            self._refresh()
+            used = set(self._manifest["Segment"])
+            if os.path.isdir(self.seg_dir):
+                for name in os.listdir(self.seg_dir):
+                    if name.endswith(".tmp") or (name.endswith(".arrow") and name not in used):
+                        self._drop_reader(name)
+                        try: os.remove(os.path.join(self.seg_dir, name))
+                        except OSError: pass
+
+    def checkpoint(self):
+        """저널을 manifest.feather 로 합치고 새 저널 세대 시작. 작은 세그먼트도 이때 합침
+        (새 세그먼트 -> 매니페스트 교체 -> 옛 파일 삭제 순서라서 중간에 죽어도 옛 매니페스트가 유효)"""
+        with self.lock:
+            self._refresh()
+            old = self._journal_path()
+            m, merged = self._compact(self._manifest)
+            self._write_manifest(m, self._gen + 1)
+            try: os.remove(old)
+            except FileNotFoundError: pass
+            for name in merged:
+                self._drop_reader(name)
+                try: os.remove(os.path.join(self.seg_dir, name))
+                except OSError: pass  # (Windows) 다른 프로세스가 열어 둔 파일은 다음 recover 때 정리
+            self._refresh()
+
+    def append(self, df, content_hashes=None):
+        """로스팅 기록 추가 (한 번의 잠금 안에서 세그먼트 + 저널 한 번 기록).
+        같은 Roast_ID 가 이미 있으면 기존 CSV 처럼 행이 이어붙여짐.
+        content_hashes = {Roast_ID: 원본 파일 내용 해시} 를 주면 매니페스트에 같이 기록 (다시 가져오기 방지)"""
+        df = normalize_frame(df)
+        if df.empty: return 0
+        groups = list(df.groupby("Roast_ID", sort=False))
+        with self.lock:
+            if not self.exists():
+                # 마이그레이션이 실패한 채로 저장소를 새로 만들면 예전 기록 없이 시작하게 됨
+                if self.migration_error is not None:
+                    raise RuntimeError(f"기존 CSV DB 마이그레이션 실패로 저장소를 만들 수 없음: {self.migration_error}")
+                self._write_manifest(pd.DataFrame(columns=MANIFEST_COLUMNS), 0)
+            self._refresh()
+            self._repair_journal()
+            rows = []
+            for start in range(0, len(groups), SEGMENT_ROASTS):
+                rows += self._write_segment(groups[start:start + SEGMENT_ROASTS], content_hashes)
+            lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+            _fsync_write(self._journal_path(), lines, mode="ab")
+            self._refresh()
+            if self._journal_rows >= CHECKPOINT_EVERY: self.checkpoint()
+        return len(groups)
+
+    @property
+    def legacy_migrated(self):
+        """기존 CSV DB 마이그레이션이 끝났는지 (매니페스트 메타데이터의 완료 표시)"""
+        self._refresh()
+        return self._legacy is not None
+
+    def migrate_csv(self, csv_path):
+        """기존 saemmulter_roasting_db.csv 를 옮기고 완료 표시를 남김 (원본 CSV 는 그대로 둠).
+        완료 표시가 없으면 다시 실행해도 됨: 이미 저장소에 있는 Roast_ID 는 건너뜀
+        (중간에 죽었거나, 실패한 뒤 앱에서 저장한 기록이 있거나, 표시가 생기기 전에 옮긴 저장소)"""
+        raw = pd.read_csv(csv_path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+        with self.lock:
+            self._refresh()
+            if self._legacy is not None: return 0  # 다른 프로세스가 먼저 옮김
+            df = normalize_frame(raw) if "Roast_ID" in raw.columns else raw.iloc[0:0]
+            if len(df): df = df[~df["Roast_ID"].isin(set(self._ids))]
+            n = self.append(df) if len(df) else 0
+            self._legacy = datetime.now().isoformat(timespec="seconds").encode()
+            self.checkpoint()  # 옮긴 행 + 완료 표시를 manifest.feather 에 한 번에 기록
+        return n
+
+
+class RoastWriter(threading.Thread):
+    """저장 요청을 모아서 한 번에 기록하는 단일 writer 스레드 (group commit).
+    여러 세션이 동시에 저장해도 잠금/fsync 는 묶음당 한 번만 일어남"""
+    def __init__(self, store, max_batch=64, linger=0.05):
+        super().__init__(daemon=True, name="roast-writer")
+        self.store = store
+        self.max_batch = max_batch
+        self.linger = linger  # 첫 요청 후 다른 요청을 기다리는 시간(초)
+        self._q = queue.Queue()
+        self.start()
+
+    def submit(self, df):
+        """df 저장 요청 -> Future (result() = 추가된 로스팅 수, 실패 시 예외)"""
+        fut = Future()
+        self._q.put((df, fut))
+        return fut
+
+    def run(self):
+        while True:
+            items = [self._q.get()]
+            deadline = time.monotonic() + self.linger
+            while len(items) < self.max_batch:
+                try: items.append(self._q.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty: break
+            try:
+                self.store.append(pd.concat([df for df, _ in items], ignore_index=True))
+                for df, fut in items: fut.set_result(df["Roast_ID"].nunique())
+            except Exception as e:
+                for _, fut in items: fut.set_exception(e)
+
+
+def open_store(root, legacy_csv=None):
+    """저장소 열기 (복구 점검 후, 기존 CSV DB 가 있고 마이그레이션 완료 표시가 없으면 옮김).
+    마이그레이션이 실패하면 예외를 store.migration_error 에 남기고 (로그에도 기록) 다음에 열 때 다시 시도"""
+    store = RoastStore(root)
+    store.recover()
+    if legacy_csv and os.path.exists(legacy_csv) and not store.legacy_migrated:
+        try: store.migrate_csv(legacy_csv)
+        except Exception as e:
+            log.exception("CSV DB 마이그레이션 실패: %s", legacy_csv)
+            store.migration_error = e
+    return store
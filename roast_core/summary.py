@@ -0,0 +1,138 @@
+"""로스팅별 요약표 (투입온도, TP, 옐로잉, 1C, 배출, DTR, 최대 RoR, 열량)
+
+전체 기록은 한 번에 벡터 연산으로 계산하고, 저장할 때는 해당 로스팅만 다시 계산해서
+DB 폴더의 summary.feather 에 반영함.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .index import RoastIndex
+
+SUMMARY_COLUMNS = ["Roast_ID", "Bean", "Rows", "Charge_Temp", "TP_Time", "TP_Temp", "Yellowing_Time",
+                   "FC_Time", "Drop_Time", "Dev_Time", "DTR", "Peak_RoR", "Energy_kJ"]
+EXTRA_COLUMNS = ["Bean", "Energy_kJ"]  # 로그에서 계산할 수 없고 저장 시 넘겨받는 값
+SUMMARY_CHUNK = 2000  # 처음 전체 계산 시 한 번에 읽을 로스팅 수
+PEAK_ROR_WINDOW = 30  # 최대 RoR 평활 구간(초). 라이브 화면의 "RoR (30초)" 와 같음
+SUMMARY_VERSION = "2"  # 계산 방식이 바뀌면 올림 -> 예전 summary.feather 의 값은 다시 계산
+VERSION_KEY = b"summary_version"
+
+
+def summarize(df):
+    """(Time, Temp, Event, Roast_ID) 프레임 -> 로스팅당 1행 요약 (iterrows 없이 groupby 로 계산)"""
+    if df is None or df.empty: return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    idx = RoastIndex(df)
+    d = idx.df
+    n = len(idx.ids)
+    key = d["Roast_ID"].cat.codes.to_numpy()
+    t = d["Time"].to_numpy(dtype=float)
+    y = d["Temp"].to_numpy(dtype=float)
+    kind = d["Event_Kind"]
+    flags = {k: (kind == k).to_numpy() for k in ("charge", "tp", "yellow")}
+    flags.update({"1c": d["is_1c"].to_numpy(), "drop": d["is_drop"].to_numpy()})
+    groups = range(n)
+
+    def first(values, mask):
+        return pd.Series(np.where(mask, values, np.nan)).groupby(key).first().reindex(groups).to_numpy()
+
+    starts = np.searchsorted(key, np.arange(n))
+    ends = np.append(starts[1:], len(d)) - 1
+    out = pd.DataFrame({"Roast_ID": idx.ids})
+    out["Bean"] = out["Roast_ID"].astype(str).str.replace(r"_[^_]*$", "", regex=True)
+    out["Rows"] = ends - starts + 1
+
+    charge = first(y, flags["charge"])
+    out["Charge_Temp"] = np.where(np.isnan(charge), y[starts], charge)
+
+    # TP: 이벤트가 없으면 최저 온도 지점
+    tp_t = first(t, flags["tp"]); tp_y = first(y, flags["tp"])
+    imin = pd.Series(y).groupby(key).idxmin().reindex(groups).to_numpy()
+    out["TP_Time"] = np.where(np.isnan(tp_t), t[imin], tp_t)
+    out["TP_Temp"] = np.where(np.isnan(tp_y), y[imin], tp_y)
+
+    out["Yellowing_Time"] = first(t, flags["yellow"])
+    fc = first(t, flags["1c"])
+    end = t[ends]
+    drop = first(t, flags["drop"])
+    out["FC_Time"] = fc
+    out["Drop_Time"] = np.where(np.isnan(drop), end, drop)
+    # 앱의 DTR 계산과 동일: 마지막 시간 기준
+    ok = ~np.isnan(fc) & (end > fc)
+    out["Dev_Time"] = np.where(ok, end - fc, np.nan)
+    out["DTR"] = np.where(ok, (end - fc) / np.where(end != 0, end, np.nan) * 100, np.nan)
+
+    # 최대 RoR (TP 이후, ror.compute_ror 와 같은 30초 평활: 지금 온도 - 30초 전 보간 온도)
+    # 로스팅마다 시간축을 띄워 붙여서 np.interp 한 번으로 모든 로스팅을 처리
+    gap = (np.nanmax(t) - np.nanmin(t)) + PEAK_ROR_WINDOW + 1.0
+    axis = t + key * gap
+    t0 = np.maximum(t - PEAK_ROR_WINDOW, t[starts][key])
+    span = t - t0
+    dt = np.diff(t, prepend=np.nan); dt[starts] = np.nan
+    valid = (dt > 0) & (span > 0) & (t >= out["TP_Time"].to_numpy()[key])
+    ror = np.divide((y - np.interp(t0 + key * gap, axis, y)) * 60.0, span, out=np.full_like(span, np.nan), where=valid)
+    out["Peak_RoR"] = pd.Series(ror).groupby(key).max().reindex(groups).to_numpy()
+    out["Energy_kJ"] = np.nan
+    return out[SUMMARY_COLUMNS]
+
+
+class SummaryTable:
+    def __init__(self, store):
+        self.store = store
+        self.path = os.path.join(store.root, "summary.feather")
+        self._df = None
+        self._synced = None
+
+    def _load_file(self):
+        try: table = feather.read_table(self.path)
+        except Exception: return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        df = table.to_pandas()
+        # 계산 방식이 바뀐 예전 파일: Bean/열량은 살리고 나머지는 다시 계산되도록 Rows 를 비움
+        if (table.schema.metadata or {}).get(VERSION_KEY) != SUMMARY_VERSION.encode(): df["Rows"] = np.nan
+        return df
+
+    def _write(self):
+        os.makedirs(self.store.root, exist_ok=True)
+        tmp = self.path + f".{os.getpid()}-{threading.get_ident() % 65536:x}.tmp"
+        table = pa.Table.from_pandas(self._df.reset_index(drop=True), preserve_index=False)
+        feather.write_feather(table.replace_schema_metadata({**(table.schema.metadata or {}), VERSION_KEY: SUMMARY_VERSION.encode()}), tmp)
+        os.replace(tmp, self.path)
+
+    def table(self):
+        """요약표. 매니페스트와 행 수가 다른(새로 추가/이어붙인) 로스팅만 다시 계산"""
+        if self._df is None: self._df = self._load_file()
+        version = self.store.version
+        if version != self._synced:
+            m = self.store.manifest
+            if not m.empty:
+                rows = m.groupby("Roast_ID", sort=False)["Rows"].sum()
+                have = self._df.set_index("Roast_ID")["Rows"] if not self._df.empty else pd.Series(dtype=float)
+                stale = rows.index[(have.reindex(rows.index) != rows).to_numpy()]
+                if len(stale): self.update(list(stale))
+            self._synced = version
+        return self._df
+
+    def update(self, roast_ids, extra=None):
+        """지정한 로스팅만 저장소에서 다시 읽어 요약 갱신. extra = {"Bean": .., "Energy_kJ": ..}
+        합치고 쓰는 부분은 저장소 잠금 안에서 파일을 다시 읽어서 하므로 다른 세션의 갱신을 덮어쓰지 않음"""
+        parts = []
+        for i in range(0, len(roast_ids), SUMMARY_CHUNK):
+            parts.append(summarize(self.store.read(roast_ids[i:i + SUMMARY_CHUNK])))
+        new = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=SUMMARY_COLUMNS)
+        with self.store.lock:
+            self._df = old = self._load_file()
+            # 기존에 저장된 Bean/열량은 유지
+            if not old.empty and not new.empty:
+                prev = old.set_index("Roast_ID")
+                for c in EXTRA_COLUMNS:
+                    kept = new["Roast_ID"].map(prev[c])
+                    new[c] = kept.where(kept.notna(), new[c])
+            for c, v in (extra or {}).items():
+                if v is not None: new[c] = v
+            rest = old[~old["Roast_ID"].isin(new["Roast_ID"])] if not old.empty else old
+            self._df = pd.concat([rest, new], ignore_index=True) if not rest.empty else new.reset_index(drop=True)
+            self._write()
+        return new
@@ -0,0 +1,247 @@
+"""로스팅 그래프 그리기 (matplotlib). Streamlit 없이 쓸 수 있어 벤치마크/스크립트에서도 사용"""
+import io
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
+from matplotlib.transforms import Bbox
+
+from roast_core import compute_ror, downsample, format_mmss, ror_bar_verts, with_event_columns
+
+OVERLAY_DETAIL_MAX = 8  # 이 개수 이하면 로스팅마다 마커/이벤트까지 전부 그림
+OVERLAY_LEGEND_MAX = 20  # 범례에 넣을 최대 로스팅 수
+# Streamlit 은 폭 1460px 을 넘는 이미지를 줄여서 다시 인코딩함 (st.pyplot 기본 dpi 200 -> 약 2100px).
+# 12인치 그림이 잘라낸 뒤 그 폭 안에 들어오도록 처음부터 이 dpi 로 그림 (화면에 보이는 크기는 같음)
+CHART_DPI = 135
+PNG_COMPRESS = 1  # zlib 레벨 (기본 6 보다 크기는 조금 크지만 인코딩이 훨씬 빠름)
+
+
+def new_roast_figure(figsize=(12, 7)):
+    """온도(ax1) + 가스(ax2) + RoR 막대(ax_ror, 축 숨김) 축 구성"""
+    fig, ax1 = plt.subplots(figsize=figsize)
+    ax2 = ax1.twinx()
+    ax_ror = ax1.twinx()
+    ax_ror.set_ylim(0, 150)
+    ax_ror.axis('off')
+    return fig, ax1, ax2, ax_ror
+
+
+def finish_roast_figure(ax1, ax2):
+    ax1.set_xlabel("Time (sec)"); ax1.set_ylabel("Temp (C)", color='#c0392b'); ax2.set_ylabel("Gas", color='#2980b9')
+    ax2.set_ylim(0, 10); ax1.grid(True, ls='--', alpha=0.5)
+    if ax1.get_legend_handles_labels()[0]: ax1.legend(loc='upper left')
+
+
+def plot_roast_data(ax_temp, ax_gas, ax_ror_bar, df, color_temp, color_gas, label_prefix, is_main=False, show_ror=False, ror_window=0, analysis_mode=False):
+    # 이벤트 분류 열(is_1c/is_2c/is_drop/Event_Kind)은 로드할 때 붙여 둔 것을 그대로 사용
+    df = with_event_columns(df)
+    hit_1c = df['is_1c'].to_numpy().nonzero()[0]; hit_2c = df['is_2c'].to_numpy().nonzero()[0]
+    idx_1c = int(hit_1c[0]) if len(hit_1c) else None
+    t_1c = df['Time'].iat[idx_1c] if idx_1c is not None else None
+    t_2c = df['Time'].iat[hit_2c[0]] if len(hit_2c) else None
+
+    # 온도 선
+    final_c_temp = color_temp if (is_main or analysis_mode) else "#bdc3c7"
+    final_c_gas = color_gas if (is_main or analysis_mode) else "#bdc3c7"
+    line_style = '-' if (is_main or analysis_mode) else '--'
+    alpha_val = 0.9 if is_main else 0.7
+
+    if idx_1c is not None and (is_main or analysis_mode):
+        ax_temp.plot(df.iloc[:idx_1c+1]['Time'], df.iloc[:idx_1c+1]['Temp'], marker='o', markersize=6, color=final_c_temp, linewidth=2, label=label_prefix)
+        ax_temp.plot(df.iloc[idx_1c:]['Time'], df.iloc[idx_1c:]['Temp'], marker='o', markersize=6, color=final_c_temp, linewidth=8, alpha=alpha_val)
+    else:
+        marker = 'o' if (is_main or analysis_mode) else None
+        ax_temp.plot(df['Time'], df['Temp'], marker=marker, markersize=5, linestyle=line_style, color=final_c_temp, linewidth=2, label=label_prefix, alpha=alpha_val)
+
+    # 가스압
+    if (is_main or analysis_mode) and 'Gas' in df.columns and df['Gas'].sum() > 0:
+        ax_gas.plot(df['Time'], df['Gas'], drawstyle='steps-post', marker='x', markersize=5, linestyle=':', color=final_c_gas, alpha=0.5, label='Gas' if is_main else None)
+
+    # [핵심] RoR Zone Bar + 수치 표시
+    if show_ror and len(df) > 1:
+        # 배열로 한 번에 계산 후 막대는 PolyCollection 하나로 그림
+        r = compute_ror(df['Time'].to_numpy(), df['Temp'].to_numpy(), window=ror_window)
+        if len(r.ror):
+            ax_ror_bar.add_collection(PolyCollection(ror_bar_verts(r), facecolors=list(r.color), edgecolors='none', alpha=0.6))
+            ax_ror_bar.autoscale_view(scaley=False)
+            # RoR 숫자 표시 (값이 3 이상, 데이터 길이에 따라 간격 조절)
+            for j in r.label_idx:
+                ax_ror_bar.text(r.x[j], r.ror[j] + 2, f"{r.ror[j]:.1f}", ha='center', va='bottom', fontsize=8, color=r.color[j], fontweight='bold')
+
+    # 이벤트
+    if is_main or analysis_mode:
+        event_points = df[df['Event_Kind'].notna()]
+
+        for i, row in enumerate(event_points.to_dict('records')):
+            label_text = str(row['Event'])
+            is_drop, is_1c_evt, is_2c_evt = row['is_drop'], row['is_1c'], row['is_2c']
+            
+            if is_drop:
+                if t_2c: label_text = f"Drop (+2C {format_mmss(row['Time']-t_2c)})"
+                elif t_1c: label_text = f"Drop (+1C {format_mmss(row['Time']-t_1c)})"
+            
+            y_offset = 25 if i % 2 == 0 else -30 
+            va_align = 'bottom' if i % 2 == 0 else 'top'
+            
+            if is_1c_evt or is_2c_evt:
+                box_props = dict(boxstyle="round,pad=0.4", fc="gold", ec="black", alpha=1.0)
+                ax_temp.scatter(row['Time'], row['Temp'], marker='*', s=400, facecolors=final_c_temp, edgecolors='black', linewidths=1.5, zorder=10)
+                ax_temp.annotate(label_text, (row['Time'], row['Temp']), xytext=(0, 20), textcoords='offset points', ha='center', weight='bold', color='black', fontsize=11, bbox=box_props)
+            elif is_drop:
+                box_props = dict(boxstyle="round,pad=0.4", fc="#9b59b6", ec="black", alpha=1.0)
+                ax_temp.annotate(label_text, (row['Time'], row['Temp']), xytext=(0, 35), textcoords='offset points', ha='center', weight='bold', color='white', fontsize=11, bbox=box_props, arrowprops=dict(arrowstyle="-", color='purple'))
+            else:
+                box_props = dict(boxstyle="round,pad=0.3", fc="white", ec=final_c_temp, alpha=0.9)
+                ax_temp.annotate(label_text, (row['Time'], row['Temp']), xytext=(0, y_offset), textcoords='offset points', ha='center', va=va_align, color='black', fontsize=10, bbox=box_props, arrowprops=dict(arrowstyle="-", color=final_c_temp))
+
+
+def plot_roast_overlay(ax_temp, ax_gas, ax_ror_bar, roasts, colors, focus=None, detail_max=OVERLAY_DETAIL_MAX, method="minmax"):
+    """여러 로스팅 겹쳐 그리기 (분석 모드). roasts = {Roast_ID: 시간순 DataFrame}
+    detail_max 개 이하면 로스팅마다 plot_roast_data, 넘으면 전체를 LineCollection 하나로 (픽셀 폭에 맞춰 다운샘플,
+    마커/이벤트 생략). focus 로스팅은 항상 전체 디테일로 맨 위에 그림"""
+    items = [(pid, df, colors[i % len(colors)]) for i, (pid, df) in enumerate(roasts.items()) if df is not None and not df.empty]
+    if len(items) <= detail_max:
+        for pid, df, c in items:
+            plot_roast_data(ax_temp, ax_gas, ax_ror_bar, df, c, c, f'{pid}', is_main=True, show_ror=False, analysis_mode=True)
+        return
+    # 그래프 폭(픽셀) 만큼만 점을 남김 - 그리는 비용이 전체 샘플 수가 아니라 픽셀 수에 비례
+    fig = ax_temp.figure
+    n_px = max(100, int(ax_temp.get_position().width * fig.get_figwidth() * fig.dpi))
+    segs, seg_colors = [], []
+    for pid, df, c in items:
+        if pid == focus: continue
+        t, y = downsample(df['Time'].to_numpy(), df['Temp'].to_numpy(), n_px, method=method)
+        segs.append(np.column_stack([t, y])); seg_colors.append(c)
+    alpha = 0.35 if focus in roasts else 0.8
+    ax_temp.add_collection(LineCollection(segs, colors=seg_colors, linewidths=1.5, alpha=alpha))
+    ax_temp.autoscale_view()
+    if len(items) <= OVERLAY_LEGEND_MAX:
+        for pid, _, c in items:
+            if pid != focus: ax_temp.add_line(Line2D([], [], color=c, linewidth=1.5, label=f'{pid}'))
+    for pid, df, c in items:
+        if pid == focus: plot_roast_data(ax_temp, ax_gas, ax_ror_bar, df, c, c, f'{pid}', is_main=True, show_ror=False, analysis_mode=True)
+
+
+def _tight_px(bbox_px, dpi, shape):
+    """bbox_inches="tight" 와 같은 잘라내기 범위 (픽셀, 위가 0 인 행 기준) -> (r0, r1, c0, c1)"""
+    pad = plt.rcParams['savefig.pad_inches'] * dpi
+    h, w = shape[:2]
+    x0, y0, x1, y1 = bbox_px.x0 - pad, bbox_px.y0 - pad, bbox_px.x1 + pad, bbox_px.y1 + pad
+    return max(0, int(h - np.ceil(y1))), min(h, int(h - np.floor(y0))), max(0, int(np.floor(x0))), min(w, int(np.ceil(x1)))
+
+
+def _encode_png(renderer, crop):
+    from PIL import Image  # matplotlib 의존성
+    r0, r1, c0, c1 = crop
+    # 배경이 불투명(흰색)이므로 알파 채널을 빼고 RGB 로 (인코딩 시간/크기 감소, 손실 없음)
+    rgb = np.ascontiguousarray(np.asarray(renderer.buffer_rgba())[r0:r1, c0:c1, :3])
+    out = io.BytesIO()
+    Image.fromarray(rgb).save(out, format="png", compress_level=PNG_COMPRESS)
+    return out.getvalue()
+
+
+def render_png(fig, dpi=CHART_DPI):
+    """그림 -> PNG 바이트 (st.pyplot 처럼 여백을 잘라냄, 압축은 가볍게)"""
+    fig.set_dpi(dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    r = canvas.get_renderer()
+    bbox = fig.get_tightbbox(r).transformed(fig.dpi_scale_trans)
+    return _encode_png(r, _tight_px(bbox, dpi, (r.height, r.width)))
+
+
+def _outside_extent(a, renderer):
+    """축 밖으로 나갈 수 있는 전경 artist 의 범위 (잘라내기용). 축에 잘리는 선/막대는 None.
+    주석은 글상자만 봄 (화살표는 항상 축 안의 점을 가리킴, get_tightbbox 보다 훨씬 빠름)"""
+    if a.get_clip_on() and (a.get_clip_box() is not None or a.get_clip_path() is not None): return None
+    if isinstance(a, Text):
+        patch = a.get_bbox_patch()
+        return patch.get_window_extent(renderer) if patch is not None else Text.get_window_extent(a, renderer)
+    return a.get_tightbbox(renderer)
+
+
+def background_mark(fig):
+    """지금까지 그린 artist 목록 = 배경 레이어 (이후에 추가한 것은 매번 새로 그리는 전경)"""
+    return {a for ax in fig.axes for a in ax.get_children()}
+
+
+class ChartCache:
+    """렌더링한 그래프 캐시 (서버 전체 공유, 항목 수 기준 LRU)
+
+    - png(key, render): 같은 key(선택한 Roast_ID, 데이터 버전, 스타일 등) 면 저장해 둔 PNG 바이트를 그대로 반환
+    - layered(fig, mark, key): 배경(축/격자/레퍼런스 곡선)은 축 범위가 같으면 픽셀 버퍼를 재사용하고 전경(현재 로스팅)만 위에 그림
+    배경 레이어는 장당 수 MB (12x7 인치, dpi 135 에서 약 6MB) 라서 PNG 와 따로 max_layers 개까지만 보관
+    """
+    def __init__(self, max_items=64, max_layers=4, dpi=CHART_DPI):
+        self.dpi = dpi
+        self._pngs = (OrderedDict(), max_items)
+        self._layers = (OrderedDict(), max_layers)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._pngs[0]) + len(self._layers[0])
+
+    def _get(self, store, key):
+        items, _ = store
+        with self._lock:
+            v = items.get(key)
+            if v is not None: items.move_to_end(key); self.hits += 1
+            else: self.misses += 1
+            return v
+
+    def _put(self, store, key, value):
+        items, limit = store
+        with self._lock:
+            items[key] = value
+            items.move_to_end(key)
+            while len(items) > limit: items.popitem(last=False)
+
+    def png(self, key, render):
+        """key 로 저장된 PNG 바이트, 없으면 render() 결과를 저장해서 반환 (key 가 None 이면 캐시 안 함)"""
+        data = self._get(self._pngs, key) if key is not None else None
+        if data is None:
+            data = render()
+            if key is not None: self._put(self._pngs, key, data)
+        return data
+
+    def layered(self, fig, mark, key):
+        """mark(background_mark) 이전 artist 는 배경, 이후는 전경. 배경 픽셀은 (key, 축 범위, 크기) 별로 재사용"""
+        fig.set_dpi(self.dpi)
+        canvas = FigureCanvasAgg(fig)
+        fg = [(ax, sorted((a for a in ax.get_children() if a not in mark and a.get_visible()), key=lambda a: a.get_zorder()))
+              for ax in fig.axes]
+        # 전경까지 포함한 자동 축 범위를 고정 (배경 재사용 여부는 이 범위로 판단)
+        lims = []
+        for ax in fig.axes:
+            xl, yl = ax.get_xlim(), ax.get_ylim()
+            ax.set_xlim(xl); ax.set_ylim(yl); lims.append((xl, yl))
+        bg_key = (key, tuple(lims), tuple(fig.get_size_inches()), self.dpi)
+        bg = self._get(self._layers, bg_key)
+        if bg is None:
+            for _, arts in fg:
+                for a in arts: a.set_visible(False)
+            canvas.draw()
+            r = canvas.get_renderer()
+            bg = (canvas.copy_from_bbox(fig.bbox), fig.get_tightbbox(r).transformed(fig.dpi_scale_trans))
+            for _, arts in fg:
+                for a in arts: a.set_visible(True)
+            self._put(self._layers, bg_key, bg)
+        else:
+            r = canvas.get_renderer()
+            canvas.restore_region(bg[0])
+        # 축 순서(온도 -> 가스 -> RoR), 축 안에서는 zorder 순 = 전체를 그릴 때와 같은 순서
+        boxes = [bg[1]]
+        for ax, arts in fg:
+            for a in arts:
+                ax.draw_artist(a)
+                b = _outside_extent(a, r)
+                if b is not None and np.isfinite(b.bounds).all(): boxes.append(b)
+        bbox = Bbox.union(boxes)
+        return _encode_png(r, _tight_px(bbox, self.dpi, (r.height, r.width)))